@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, PasswordResetToken
+from .models import User, PasswordResetToken, EmailOutbox
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -30,4 +30,11 @@ class PasswordResetTokenAdmin(admin.ModelAdmin):
     list_display = ['user', 'token', 'is_used', 'created_at']
     list_filter = ['is_used', 'created_at']
     search_fields = ['user__email', 'token']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'to', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
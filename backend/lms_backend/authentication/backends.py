@@ -0,0 +1,98 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import router
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+# User fields copied into access tokens by get_tokens_for_user. Only fields
+# re-checked per request belong here: anything else (names included) would be
+# stale for the token's lifetime, so it stays deferred and loads from the row.
+TOKEN_USER_CLAIMS = ('role', 'is_active')
+
+
+def add_user_claims(token, user):
+    for claim in TOKEN_USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserStateCache:
+    # Short-lived, per-process view of (is_active, role) so deactivations and
+    # role changes take effect within `ttl` seconds without a query per request.
+    max_entries = 10000
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'LMS_STATELESS_AUTH_CACHE_TTL', 60)
+
+    def get(self, user_id):
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        state = User.objects.filter(pk=user_id).values_list('is_active', 'role').first()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (now + self.ttl, state)
+        return state
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_state_cache = UserStateCache()
+
+
+def build_token_user(user_id, claims):
+    # A real User instance whose other fields are deferred, so touching one
+    # (e.g. email or bio) loads it from the database on demand.
+    values = dict(claims, id=user_id)
+    field_names = []
+    field_values = []
+    for field in User._meta.concrete_fields:
+        if field.attname in values:
+            field_names.append(field.attname)
+            field_values.append(values[field.attname])
+    user = User.from_db(router.db_for_read(User), field_names, field_values)
+    user._from_token = True
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_USER_CLAIMS):
+            # Tokens issued before the claims were added.
+            return super().get_user(validated_token)
+
+        try:
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValueError, TypeError):
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        state = user_state_cache.get(user_id)
+        if state is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        is_active, role = state
+        if not is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        claims = {claim: validated_token[claim] for claim in TOKEN_USER_CLAIMS}
+        claims.update(is_active=is_active, role=role)
+        return build_token_user(user_id, claims)
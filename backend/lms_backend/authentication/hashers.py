@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PolicyPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    # Iteration count comes from LMS_PASSWORD_HASH_ITERATIONS. Django rehashes a
+    # stored password on the next successful login whenever it differs.
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'LMS_PASSWORD_HASH_ITERATIONS', None) or PBKDF2PasswordHasher.iterations
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.models import PasswordResetToken
+from authentication.outbox import scrub_finished
+
+
+class Command(BaseCommand):
+    help = 'Delete expired and used password reset tokens and scrub sent reset emails in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            # Each batch is its own short statement so locks are held briefly.
+            ids = list(
+                PasswordResetToken.objects.purgeable()
+                .order_by()
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            count, _ = PasswordResetToken.objects.filter(pk__in=ids).delete()
+            deleted += count
+            if options['pause']:
+                time.sleep(options['pause'])
+        scrubbed = scrub_finished(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} password reset tokens, scrubbed {scrubbed} sent emails'
+        ))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox table in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=4, help='Sender threads, each with its own SMTP connection')
+        parser.add_argument('--loop', action='store_true', help='Keep polling instead of exiting once the outbox is drained')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep between polls when idle')
+
+    def handle(self, *args, **options):
+        totals = [0, 0, 0]
+        while True:
+            sent, retried, failed = process_batch(options['batch_size'], options['workers'])
+            totals = [totals[0] + sent, totals[1] + retried, totals[2] + failed]
+            if sent or retried or failed:
+                self.stdout.write(f'sent={sent} retry={retried} failed={failed}')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Outbox drained: {totals[0]} sent, {totals[1]} scheduled for retry, {totals[2]} failed'
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 08:52
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_existing_tokens(apps, schema_editor):
+    PasswordResetToken = apps.get_model('authentication', 'PasswordResetToken')
+    for reset_token in PasswordResetToken.objects.filter(is_used=False).iterator():
+        reset_token.token = hashlib.sha256(reset_token.token.encode()).hexdigest()
+        reset_token.save(update_fields=['token'])
+    # Used tokens can never be redeemed again, so there is nothing to keep.
+    PasswordResetToken.objects.filter(is_used=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(fields=['is_used', 'created_at'], name='reset_tokens_purge_idx'),
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,9 @@
 from django.db import models
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import hashlib
+import secrets
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 import uuid
 
@@ -61,16 +66,83 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        # Users built from JWT claims (authentication.backends) load every
+        # deferred field on first access instead of one query per field.
+        if fields is not None and getattr(self, '_from_token', False):
+            deferred = self.get_deferred_fields()
+            if deferred and set(fields) <= deferred:
+                fields = list(deferred)
+        return super().refresh_from_db(using=using, fields=fields, **kwargs)
+
+
+class PasswordResetTokenQuerySet(models.QuerySet):
+    def usable(self):
+        return self.filter(is_used=False, created_at__gte=timezone.now() - PasswordResetToken.ttl())
+    
+    def purgeable(self):
+        return self.filter(models.Q(is_used=True) | models.Q(created_at__lt=timezone.now() - PasswordResetToken.ttl()))
 
 
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # SHA-256 of the token sent to the user; the raw token is never stored.
     token = models.CharField(max_length=100, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_used = models.BooleanField(default=False)
     
+    objects = PasswordResetTokenQuerySet.as_manager()
+    
     class Meta:
         db_table = 'password_reset_tokens'
+        indexes = [
+            models.Index(fields=['is_used', 'created_at'], name='reset_tokens_purge_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Reset token for {self.user.email}"
+    
+    @staticmethod
+    def ttl():
+        return timedelta(seconds=getattr(settings, 'LMS_PASSWORD_RESET_TOKEN_TTL', 60 * 60))
+    
+    @staticmethod
+    def hash_token(raw_token):
+        return hashlib.sha256(raw_token.encode()).hexdigest()
+    
+    @classmethod
+    def issue(cls, user):
+        # Returns (instance, raw_token); only the hash is persisted.
+        raw_token = secrets.token_urlsafe(32)
+        return cls.objects.create(user=user, token=cls.hash_token(raw_token)), raw_token
+
+
+class EmailOutbox(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'email_outbox'
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_outbox_due_idx'),
+        ]
     
     def __str__(self):
-        return f"Reset token for {self.user.email}"
\ No newline at end of file
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,109 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, body, to, from_email='noreply@lms.com'):
+    return EmailOutbox.objects.create(subject=subject, body=body, from_email=from_email, to=list(to))
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def claim_batch(batch_size):
+    # Claimed rows get a lease: if the worker dies they become due again.
+    now = timezone.now()
+    lease = timedelta(seconds=_setting('LMS_EMAIL_OUTBOX_LEASE', 300))
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['pending', 'sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+            status='sending', next_attempt_at=now + lease
+        )
+    return rows
+
+
+def _send_chunk(rows):
+    # One SMTP connection per thread, reused for the whole chunk.
+    results = []
+    connection = get_connection()
+    try:
+        connection.open()
+        for row in rows:
+            message = EmailMessage(row.subject, row.body, row.from_email, row.to, connection=connection)
+            try:
+                connection.send_messages([message])
+                results.append((row, None))
+            except Exception as exc:
+                results.append((row, exc))
+    except Exception as exc:
+        results.extend((row, exc) for row in rows[len(results):])
+    finally:
+        connection.close()
+    return results
+
+
+def scrub_finished(batch_size=1000):
+    # Clears bodies left on sent/failed rows (e.g. queued before scrubbing on send).
+    scrubbed = 0
+    while True:
+        ids = list(
+            EmailOutbox.objects.filter(status__in=['sent', 'failed']).exclude(body='')
+            .order_by().values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return scrubbed
+        scrubbed += EmailOutbox.objects.filter(pk__in=ids).update(body='')
+
+
+def _record_results(results):
+    now = timezone.now()
+    max_attempts = _setting('LMS_EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    backoff = _setting('LMS_EMAIL_OUTBOX_BACKOFF', 30)
+    sent, retried, failed = [], [], []
+    for row, error in results:
+        row.attempts += 1
+        if error is None:
+            # Bodies can carry secrets (reset links), so only undelivered rows keep one.
+            row.status, row.sent_at, row.last_error, row.body = 'sent', now, '', ''
+            sent.append(row)
+            continue
+        row.last_error = f'{type(error).__name__}: {error}'
+        if row.attempts >= max_attempts:
+            row.status, row.body = 'failed', ''
+            failed.append(row)
+        else:
+            row.status = 'pending'
+            row.next_attempt_at = now + timedelta(seconds=backoff * 2 ** (row.attempts - 1))
+            retried.append(row)
+        logger.warning('Email %s attempt %s failed: %s', row.pk, row.attempts, row.last_error)
+    EmailOutbox.objects.bulk_update(
+        [row for row, error in results],
+        ['status', 'attempts', 'sent_at', 'last_error', 'next_attempt_at', 'body']
+    )
+    return len(sent), len(retried), len(failed)
+
+
+def process_batch(batch_size=100, workers=4):
+    rows = claim_batch(batch_size)
+    if not rows:
+        return 0, 0, 0
+    workers = max(1, min(workers, len(rows)))
+    chunks = [rows[index::workers] for index in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = [result for chunk in executor.map(_send_chunk, chunks) for result in chunk]
+    return _record_results(results)
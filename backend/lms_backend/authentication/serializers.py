@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from .models import User, PasswordResetToken
+from lms_core.images import image_srcset
 import uuid
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -45,14 +46,18 @@ class UserLoginSerializer(serializers.Serializer):
 
 class UserSerializer(serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
+    profile_image_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = User
-        fields = ['id', 'email', 'first_name', 'last_name', 'full_name', 'role', 'phone', 'bio', 'profile_image', 'created_at']
+        fields = ['id', 'email', 'first_name', 'last_name', 'full_name', 'role', 'phone', 'bio', 'profile_image', 'profile_image_srcset', 'created_at']
         read_only_fields = ['id', 'email', 'created_at']
     
     def get_full_name(self, obj):
         return obj.get_full_name()
+    
+    def get_profile_image_srcset(self, obj):
+        return image_srcset(obj.profile_image.name, self.context.get('request'))
 
 
 class ProfileUpdateSerializer(serializers.ModelSerializer):
@@ -64,12 +69,12 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
 class ForgetPasswordSerializer(serializers.Serializer):
     email = serializers.EmailField()
     
-    def validate_email(self, value):
+    def validate(self, data):
         try:
-            user = User.objects.get(email=value)
+            data['user'] = User.objects.get(email=data['email'])
         except User.DoesNotExist:
-            raise serializers.ValidationError("User with this email does not exist")
-        return value
+            raise serializers.ValidationError({'email': "User with this email does not exist"})
+        return data
 
 
 class ResetPasswordSerializer(serializers.Serializer):
@@ -82,7 +87,9 @@ class ResetPasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError("Passwords do not match")
         
         try:
-            reset_token = PasswordResetToken.objects.get(token=data['token'], is_used=False)
+            reset_token = PasswordResetToken.objects.usable().select_related('user').get(
+                token=PasswordResetToken.hash_token(data['token'])
+            )
         except PasswordResetToken.DoesNotExist:
             raise serializers.ValidationError("Invalid or expired token")
         
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+
+from .models import User
+from .backends import user_state_cache
+
+
+def evict_user_state(sender, instance, **kwargs):
+    user_state_cache.evict(instance.pk)
+
+
+post_save.connect(evict_user_state, sender=User, dispatch_uid='stateless_auth_user_save')
+post_delete.connect(evict_user_state, sender=User, dispatch_uid='stateless_auth_user_delete')
@@ -1,3 +1,218 @@
-from django.test import TestCase
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .backends import StatelessJWTAuthentication, user_state_cache
+from .models import EmailOutbox, PasswordResetToken, User
+from .outbox import process_batch
+from .throttles import LoginIPThrottle
+from .views import get_tokens_for_user
+
+
+class StatelessProfileTests(TestCase):
+    def setUp(self):
+        # DRF reads DEFAULT_AUTHENTICATION_CLASSES when views are defined.
+        patcher = mock.patch.object(APIView, 'authentication_classes', [StatelessJWTAuthentication])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        user_state_cache.clear()
+        self.user = User.objects.create_user(
+            email='student@example.com', password='password123', first_name='Old', last_name='Name'
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.user)['access']}")
+
+    def test_partial_put_keeps_names_changed_after_login(self):
+        User.objects.filter(pk=self.user.pk).update(first_name='New', last_name='Person')
+
+        response = self.client.put('/api/auth/profile/', {'bio': 'Hello'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['user']['first_name'], response.data['user']['bio']), ('New', 'Hello'))
+
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.last_name, self.user.bio), ('New', 'Person', 'Hello'))
+
+    def test_put_does_not_write_back_cached_role(self):
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+        # Changed by another process: this process's state cache still says student.
+        User.objects.filter(pk=self.user.pk).update(role='instructor')
+
+        response = self.client.put('/api/auth/profile/', {'first_name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.role), ('Renamed', 'instructor'))
+
+    def test_names_are_read_from_the_database(self):
+        User.objects.filter(pk=self.user.pk).update(first_name='Fresh')
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['first_name'], 'Fresh')
+
+    def test_tokens_carry_only_rechecked_claims(self):
+        token = RefreshToken(get_tokens_for_user(self.user)['refresh'])
+        self.assertEqual((token['role'], token['is_active']), ('student', True))
+        self.assertNotIn('first_name', token.payload)
+
+
+class OutboxScrubTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(email='student@example.com', password='password123')
+
+    def request_reset(self):
+        response = APIClient().post('/api/auth/forget-password/', {'email': 'student@example.com'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    def test_sent_email_body_is_scrubbed(self):
+        token = self.request_reset()
+        self.assertIn(token, EmailOutbox.objects.get().body)
+
+        self.assertEqual(process_batch(workers=1), (1, 0, 0))
+        self.assertIn(token, mail.outbox[0].body)
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.body), ('sent', ''))
+
+    @override_settings(LMS_EMAIL_OUTBOX_MAX_ATTEMPTS=1)
+    def test_failed_email_body_is_scrubbed(self):
+        self.request_reset()
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=OSError('down')):
+            self.assertEqual(process_batch(workers=1), (0, 0, 1))
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.body), ('failed', ''))
+
+    def test_retried_email_keeps_body(self):
+        token = self.request_reset()
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=OSError('down')):
+            self.assertEqual(process_batch(workers=1), (0, 1, 0))
+        self.assertIn(token, EmailOutbox.objects.get().body)
+
+    def test_purge_scrubs_previously_sent_bodies(self):
+        sent = EmailOutbox.objects.create(subject='s', body='token=abc', from_email='a@b.c', to=['x@y.z'], status='sent')
+        pending = EmailOutbox.objects.create(subject='s', body='token=def', from_email='a@b.c', to=['x@y.z'])
+        call_command('purge_password_reset_tokens', batch_size=1, stdout=mock.Mock())
+        sent.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual((sent.body, pending.body), ('', 'token=def'))
+
+
+class PasswordResetTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='student@example.com', password='password123')
+
+    def request_reset(self):
+        return APIClient().post('/api/auth/forget-password/', {'email': 'student@example.com'}, format='json').data['token']
+
+    def reset(self, token, password='new-password-1'):
+        return APIClient().post('/api/auth/reset-password/', {
+            'token': token, 'new_password': password, 'confirm_password': password,
+        }, format='json')
+
+    def age(self, token, seconds):
+        PasswordResetToken.objects.filter(token=PasswordResetToken.hash_token(token)).update(
+            created_at=timezone.now() - timedelta(seconds=seconds)
+        )
+
+    def test_token_is_looked_up_by_its_hash(self):
+        token = self.request_reset()
+        stored = PasswordResetToken.objects.get()
+        self.assertEqual(stored.token, hashlib.sha256(token.encode()).hexdigest())
+        # The stored value is not itself a usable token.
+        self.assertEqual(self.reset(stored.token).status_code, 400)
+
+        self.assertEqual(self.reset(token).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-password-1'))
+        self.assertEqual(self.reset(token, 'another-password').status_code, 400)
+
+    @override_settings(LMS_PASSWORD_RESET_TOKEN_TTL=600)
+    def test_token_older_than_ttl_is_rejected(self):
+        token = self.request_reset()
+        self.age(token, 601)
+        self.assertEqual(self.reset(token).status_code, 400)
+
+        token = self.request_reset()
+        self.age(token, 590)
+        self.assertEqual(self.reset(token).status_code, 200)
+
+    @override_settings(LMS_PASSWORD_RESET_TOKEN_TTL=600)
+    def test_purge_deletes_expired_and_used_tokens_in_batches(self):
+        expired = [PasswordResetToken.issue(self.user)[1] for _ in range(3)]
+        for token in expired:
+            self.age(token, 601)
+        used = [PasswordResetToken.issue(self.user)[0] for _ in range(2)]
+        PasswordResetToken.objects.filter(pk__in=[token.pk for token in used]).update(is_used=True)
+        fresh = [PasswordResetToken.issue(self.user)[0] for _ in range(2)]
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_password_reset_tokens', batch_size=2, stdout=mock.Mock())
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE FROM "password_reset_tokens"')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(set(PasswordResetToken.objects.values_list('pk', flat=True)), {token.pk for token in fresh})
+
+
+@mock.patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '3/min'})
+class LoginIPThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def login(self, index, **headers):
+        return APIClient().post(
+            '/api/auth/login/', {'email': f'user{index}@example.com', 'password': 'wrong'},
+            format='json', REMOTE_ADDR='10.0.0.1', **headers
+        )
+
+    def test_spoofed_forwarded_for_does_not_reset_the_bucket(self):
+        codes = [self.login(index, HTTP_X_FORWARDED_FOR=f'203.0.113.{index}').status_code for index in range(4)]
+        self.assertNotIn(429, codes[:3])
+        self.assertEqual(codes[3], 429)
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_forwarded_for_is_used_behind_a_trusted_proxy(self):
+        codes = [self.login(index, HTTP_X_FORWARDED_FOR=f'203.0.113.{index}').status_code for index in range(4)]
+        self.assertNotIn(429, codes)
+
+
+@mock.patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '5/min'})
+class ThrottleLoadTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_concurrent_logins_share_one_bucket(self):
+        # A slow cache read widens the window between reading and writing the
+        # bucket; without the lock most of the burst would get through.
+        real_get = LocMemCache.get
+
+        def slow_get(cache_self, key, *args, **kwargs):
+            value = real_get(cache_self, key, *args, **kwargs)
+            time.sleep(0.002)
+            return value
+
+        def login(index):
+            try:
+                return APIClient().post(
+                    '/api/auth/login/', {'email': f'user{index}@example.com', 'password': 'wrong'},
+                    format='json', REMOTE_ADDR='10.0.0.1',
+                ).status_code
+            finally:
+                connections.close_all()
+
+        with mock.patch.object(LocMemCache, 'get', slow_get), ThreadPoolExecutor(16) as executor:
+            codes = list(executor.map(login, range(48)))
+        self.assertEqual(len(codes) - codes.count(429), 5)
@@ -0,0 +1,71 @@
+import time
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# The bucket's read-modify-write runs under a cache.add lock, so concurrent
+# requests (across workers, with a shared cache) can't spend the same token.
+LOCK_TIMEOUT = 1
+LOCK_WAIT = 0.5
+LOCK_POLL_INTERVAL = 0.002
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    # Rates use the DRF "num/period" format: a bucket of `num` tokens that
+    # refills continuously over `period`, so bursts are allowed up to `num`.
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        lock_key = f'{self.key}:lock'
+        deadline = time.monotonic() + LOCK_WAIT
+        while not self.cache.add(lock_key, 1, LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                # Still contended: refuse rather than let the request skip the bucket.
+                self.tokens = 0
+                return self.throttle_failure()
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            return self.take_token()
+        finally:
+            self.cache.delete(lock_key)
+
+    def take_token(self):
+        self.now = self.timer()
+        tokens, updated_at = self.cache.get(self.key, (self.num_requests, self.now))
+        refill = (self.now - updated_at) * self.num_requests / self.duration
+        self.tokens = min(self.num_requests, tokens + refill)
+        if self.tokens < 1:
+            return self.throttle_failure()
+
+        self.cache.set(self.key, (self.tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email or not isinstance(email, str):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': email.strip().lower()}
+
+
+class RegistrationIPThrottle(LoginIPThrottle):
+    scope = 'register_ip'
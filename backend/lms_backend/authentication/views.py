@@ -3,17 +3,19 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import send_mail
-import uuid
+from django.db import transaction
 
 from .models import User, PasswordResetToken
+from .backends import add_user_claims
+from .outbox import queue_email
+from .throttles import LoginIPThrottle, LoginEmailThrottle, RegistrationIPThrottle
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer,
     ProfileUpdateSerializer, ForgetPasswordSerializer, ResetPasswordSerializer
 )
 
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -21,6 +23,7 @@ def get_tokens_for_user(user):
 
 class UserRegistrationView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegistrationIPThrottle]
     
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
@@ -37,6 +40,7 @@ class UserRegistrationView(APIView):
 
 class UserLoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
     
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data, context={'request': request})
@@ -73,12 +77,17 @@ class ProfileView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def put(self, request):
-        serializer = ProfileUpdateSerializer(request.user, data=request.data, partial=True)
+        user = request.user
+        if getattr(user, '_from_token', False):
+            # Claim-built users hold cached role/is_active values; save() would
+            # write them back, so update the stored row instead.
+            user = User.objects.get(pk=user.pk)
+        serializer = ProfileUpdateSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response({
                 'message': 'Profile updated successfully',
-                'user': UserSerializer(request.user).data
+                'user': UserSerializer(user).data
             }, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -90,21 +99,19 @@ class ForgetPasswordView(APIView):
         serializer = ForgetPasswordSerializer(data=request.data)
         if serializer.is_valid():
             email = serializer.validated_data['email']
-            user = User.objects.get(email=email)
-            
-            # Generate reset token
-            token = str(uuid.uuid4())
-            PasswordResetToken.objects.create(user=user, token=token)
+            user = serializer.validated_data['user']
             
-            # Send email (console backend in development)
-            reset_link = f"http://localhost:3000/reset-password?token={token}"
-            send_mail(
-                'Password Reset Request',
-                f'Click the link to reset your password: {reset_link}',
-                'noreply@lms.com',
-                [email],
-                fail_silently=False,
-            )
+            with transaction.atomic():
+                # Generate reset token
+                reset_token, token = PasswordResetToken.issue(user)
+                
+                # Queued; delivered by `manage.py send_queued_emails`
+                reset_link = f"http://localhost:3000/reset-password?token={token}"
+                queue_email(
+                    'Password Reset Request',
+                    f'Click the link to reset your password: {reset_link}',
+                    [email],
+                )
             
             return Response({
                 'message': 'Password reset link sent to your email',
@@ -126,8 +133,8 @@ class ResetPasswordView(APIView):
             user.set_password(new_password)
             user.save()
             
-            reset_token.is_used = True
-            reset_token.save()
+            # Also retires any other outstanding tokens for this user
+            PasswordResetToken.objects.filter(user=user, is_used=False).update(is_used=True)
             
             return Response({
                 'message': 'Password reset successful'
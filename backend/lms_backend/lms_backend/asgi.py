@@ -10,7 +10,15 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.exceptions import ImproperlyConfigured
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lms_backend.settings')
 
 application = get_asgi_application()
+
+# Imported once the app registry is ready.
+from lms_core.checks import check_asgi_connections  # noqa: E402
+
+errors = check_asgi_connections()
+if errors:
+    raise ImproperlyConfigured('; '.join(f'{error.msg} {error.hint}' for error in errors))
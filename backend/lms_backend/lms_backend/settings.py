@@ -47,7 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'lms_core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'lms_core.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,12 +83,91 @@ WSGI_APPLICATION = 'lms_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
+# Set DB_ENGINE=postgresql (plus DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT) for
+# production; DB_POOL=True uses psycopg's connection pool instead of persistent connections.
+# DB_CONN_MAX_AGE (persistent connections) is for WSGI workers only: under ASGI each
+# sync_to_async thread would keep its own connection open for that long, so it
+# defaults to 0 and ASGI deployments on Postgres should use DB_POOL instead.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 0))
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = os.environ.get('DB_POOL', 'False') == 'True'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'lms'),
+            'USER': os.environ.get('DB_USER', 'lms'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Pooled connections go back to the pool, so they can't also persist.
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Seconds a writer waits on the file lock (busy_timeout) before "database is locked".
+                'timeout': int(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', 20)),
+                # Take the write lock at BEGIN so concurrent writers queue on busy_timeout
+                # instead of failing when a read transaction tries to upgrade.
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    f"PRAGMA mmap_size={int(os.environ.get('DB_SQLITE_MMAP_SIZE', 128 * 1024 * 1024))};"
+                ),
+            },
+            # A file rather than the shared in-memory default, whose table locks
+            # fail at once instead of waiting, so concurrency tests see real locking.
+            'TEST': {
+                'NAME': os.environ.get('DB_TEST_NAME', BASE_DIR / 'test_db.sqlite3'),
+            },
+        }
+    }
+
+# Optional read replica for reports and the course catalog: set DB_REPLICA_NAME
+# and/or DB_REPLICA_HOST (other connection settings are shared with `default`).
+
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default'].get('HOST', '')),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['lms_core.routers.ReplicaRouter']
+
+
+# Cache
+# Any Django cache backend works; set CACHE_BACKEND to e.g.
+# django.core.cache.backends.redis.RedisCache with a redis:// URL as CACHE_LOCATION.
+# The default LocMemCache lives inside each worker process, so a change seen by one
+# worker can't invalidate another worker's copies: with it, cached catalog
+# responses are kept for at most LMS_LOCAL_CACHE_TIMEOUT seconds.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'lms-cache'),
     }
 }
+LMS_LOCAL_CACHE_TIMEOUT = int(os.environ.get('LMS_LOCAL_CACHE_TIMEOUT', 5))
 
 
 # Password validation
@@ -108,6 +189,20 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing: the first hasher is used for new hashes; stored hashes with
+# a different algorithm or iteration count are upgraded on the next login.
+
+LMS_PASSWORD_HASH_ITERATIONS = int(os.environ.get('LMS_PASSWORD_HASH_ITERATIONS', 0)) or None
+
+PASSWORD_HASHERS = [
+    'authentication.hashers.PolicyPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -129,18 +224,57 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored under their content hash (identical files are kept once);
+# resized WebP/JPEG variants are written under media/variants/.
+STORAGES = {
+    'default': {'BACKEND': 'lms_core.storage.ContentHashedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+LMS_IMAGE_VARIANT_WIDTHS = [int(width) for width in os.environ.get('LMS_IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')]
+LMS_IMAGE_VARIANT_FORMATS = ['webp', 'jpg']
+# Only uploads under these directories get variants, on upload or on first request.
+LMS_IMAGE_VARIANT_SOURCES = ['course_thumbnails/', 'profiles/']
+LMS_IMAGE_WORKERS = int(os.environ.get('LMS_IMAGE_WORKERS', 2))
+
+# Media serving (/media/...): with LMS_MEDIA_OFFLOAD set to 'x-accel-redirect' (nginx,
+# internal location at LMS_MEDIA_ACCEL_PREFIX) or 'x-sendfile' (Apache/lighttpd) the
+# front server sends the bytes; otherwise FileResponse streams them (sendfile via
+# wsgi.file_wrapper where the server supports it). Non-hashed names are cached for
+# LMS_MEDIA_MAX_AGE seconds; content-hashed ones are immutable.
+LMS_MEDIA_OFFLOAD = os.environ.get('LMS_MEDIA_OFFLOAD', '')
+LMS_MEDIA_ACCEL_PREFIX = os.environ.get('LMS_MEDIA_ACCEL_PREFIX', '/protected-media/')
+LMS_MEDIA_MAX_AGE = int(os.environ.get('LMS_MEDIA_MAX_AGE', 60 * 60))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'authentication.User'
 
+# Stateless JWT auth builds request.user from token claims instead of loading
+# the user row on every request; role/is_active are re-checked every
+# LMS_STATELESS_AUTH_CACHE_TTL seconds per process.
+LMS_STATELESS_JWT_AUTH = os.environ.get('LMS_STATELESS_JWT_AUTH', 'False') == 'True'
+LMS_STATELESS_AUTH_CACHE_TTL = int(os.environ.get('LMS_STATELESS_AUTH_CACHE_TTL', 60))
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'authentication.backends.StatelessJWTAuthentication'
+        if LMS_STATELESS_JWT_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Token buckets for the auth endpoints (authentication/throttles.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('LMS_THROTTLE_LOGIN_IP', '30/min'),
+        'login_email': os.environ.get('LMS_THROTTLE_LOGIN_EMAIL', '5/min'),
+        'register_ip': os.environ.get('LMS_THROTTLE_REGISTER_IP', '10/hour'),
+    },
+    # Trusted reverse proxies in front of the app. With the default 0 the
+    # throttles key on REMOTE_ADDR; unset, DRF trusts a client-sent X-Forwarded-For.
+    'NUM_PROXIES': int(os.environ.get('LMS_NUM_PROXIES', 0)),
 }
 
 # JWT Configuration
@@ -178,3 +312,60 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Email Configuration (for password reset)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Password reset tokens expire after this many seconds; expired and used tokens
+# are deleted by `manage.py purge_password_reset_tokens`.
+LMS_PASSWORD_RESET_TOKEN_TTL = int(os.environ.get('LMS_PASSWORD_RESET_TOKEN_TTL', 60 * 60))
+
+# Outbox worker (`manage.py send_queued_emails`): retries back off
+# exponentially from LMS_EMAIL_OUTBOX_BACKOFF seconds.
+LMS_EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('LMS_EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+LMS_EMAIL_OUTBOX_BACKOFF = int(os.environ.get('LMS_EMAIL_OUTBOX_BACKOFF', 30))
+LMS_EMAIL_OUTBOX_LEASE = int(os.environ.get('LMS_EMAIL_OUTBOX_LEASE', 300))
+
+# Dashboard stats: serve DashboardStatsView from signal-maintained counters
+# (reconcile with `manage.py reconcile_dashboard_counters`) instead of aggregate queries.
+LMS_DASHBOARD_COUNTERS = os.environ.get('LMS_DASHBOARD_COUNTERS', 'False') == 'True'
+
+# Bulk enrollment (POST /api/lms/enrollments/bulk/)
+LMS_BULK_ENROLLMENT_BATCH_SIZE = int(os.environ.get('LMS_BULK_ENROLLMENT_BATCH_SIZE', 500))
+LMS_BULK_ENROLLMENT_MAX_ROWS = int(os.environ.get('LMS_BULK_ENROLLMENT_MAX_ROWS', 10000))
+
+# Progress ticks (POST /api/lms/enrollments/<id>/progress/) are buffered in the cache
+# and written in batches of LMS_PROGRESS_BATCH_SIZE at most every LMS_PROGRESS_FLUSH_INTERVAL
+# seconds. Buffered ticks have no TTL and stay until written: run
+# `manage.py flush_enrollment_progress --loop` alongside the app so quiet periods
+# are flushed too, and once without --loop on deploy/shutdown to drain the buffer.
+# With a per-process cache (LocMemCache) ticks are written straight to the table instead.
+LMS_PROGRESS_FLUSH_INTERVAL = int(os.environ.get('LMS_PROGRESS_FLUSH_INTERVAL', 10))
+LMS_PROGRESS_BATCH_SIZE = int(os.environ.get('LMS_PROGRESS_BATCH_SIZE', 500))
+
+# How long a replayable response is kept for a client Idempotency-Key header (seconds)
+LMS_IDEMPOTENCY_TTL = int(os.environ.get('LMS_IDEMPOTENCY_TTL', 60 * 60 * 24))
+
+# Read replica routing: clients that wrote are pinned to the primary for
+# LMS_REPLICA_PIN_SECONDS; the replica is skipped while it lags more than
+# LMS_REPLICA_MAX_LAG seconds (re-checked every LMS_REPLICA_CHECK_INTERVAL seconds).
+# Pins are kept in the default cache, so a replica requires a shared CACHE_BACKEND.
+LMS_REPLICA_ALIAS = 'replica'
+LMS_REPLICA_PIN_SECONDS = int(os.environ.get('LMS_REPLICA_PIN_SECONDS', 15))
+LMS_REPLICA_MAX_LAG = float(os.environ.get('LMS_REPLICA_MAX_LAG', 5))
+LMS_REPLICA_CHECK_INTERVAL = float(os.environ.get('LMS_REPLICA_CHECK_INTERVAL', 5))
+
+# Per-request instrumentation (Server-Timing header + a JSON log line per request).
+# A share of requests (LMS_PERF_SAMPLE_RATE) feeds GET /api/lms/perf/stats/; statements
+# repeated LMS_PERF_DUPLICATE_THRESHOLD times in one request are reported as likely N+1.
+LMS_PERF_INSTRUMENTATION = os.environ.get('LMS_PERF_INSTRUMENTATION', 'False') == 'True'
+LMS_PERF_SAMPLE_RATE = float(os.environ.get('LMS_PERF_SAMPLE_RATE', 0.1))
+LMS_PERF_DUPLICATE_THRESHOLD = int(os.environ.get('LMS_PERF_DUPLICATE_THRESHOLD', 3))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'lms_core.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
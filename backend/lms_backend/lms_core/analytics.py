@@ -0,0 +1,136 @@
+import datetime
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, Trunc, TruncDate
+from django.utils import timezone
+
+from .models import Enrollment, EnrollmentDailyRollup
+
+
+ROLLUP_COLUMNS = ('enrolled', 'completed', 'dropped')
+PERIODS = ('day', 'week', 'month')
+DEFAULT_PERIOD_COUNTS = {'day': 30, 'week': 12, 'month': 12}
+# Longest series one request may ask for (about a year of days, three of weeks, ten of months).
+MAX_PERIOD_COUNTS = {'day': 366, 'week': 157, 'month': 120}
+
+
+def _day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def rollup_state(instance):
+    values = instance.__dict__
+    return (
+        values.get('course_id'), values.get('status'),
+        values.get('enrolled_at'), values.get('completed_at'), values.get('dropped_at'),
+    )
+
+
+def rollup_keys(state):
+    # (course_id, day, column) cells one enrollment counts towards; must mirror
+    # rebuild_enrollment_rollups.
+    course_id, status, enrolled_at, completed_at, dropped_at = state
+    if course_id is None or enrolled_at is None:
+        return []
+    keys = [(course_id, _day(enrolled_at), 'enrolled')]
+    if status == 'completed':
+        keys.append((course_id, _day(completed_at or enrolled_at), 'completed'))
+    elif status == 'dropped':
+        keys.append((course_id, _day(dropped_at or enrolled_at), 'dropped'))
+    return keys
+
+
+def apply_rollup_deltas(deltas):
+    cells = defaultdict(dict)
+    for (course_id, day, column), delta in deltas.items():
+        if delta:
+            cells[(course_id, day)][column] = delta
+    for (course_id, day), columns in cells.items():
+        rows = EnrollmentDailyRollup.objects.filter(course_id=course_id, day=day)
+        updates = {column: F(column) + delta for column, delta in columns.items()}
+        if rows.update(**updates) or not any(delta > 0 for delta in columns.values()):
+            # Decrements for a missing row come from cascading deletes; nothing to undo.
+            continue
+        try:
+            with transaction.atomic():
+                EnrollmentDailyRollup.objects.create(course_id=course_id, day=day, **columns)
+        except IntegrityError:
+            rows.update(**updates)
+
+
+def rebuild_enrollment_rollups(batch_size=1000):
+    # Recomputes the whole table from the enrollments table with three grouped
+    # aggregates; returns the number of rollup rows written.
+    cells = defaultdict(Counter)
+    aggregates = [
+        ('enrolled', Enrollment.objects.all(), F('enrolled_at')),
+        ('completed', Enrollment.objects.filter(status='completed'), Coalesce('completed_at', 'enrolled_at')),
+        ('dropped', Enrollment.objects.filter(status='dropped'), Coalesce('dropped_at', 'enrolled_at')),
+    ]
+    for column, queryset, timestamp in aggregates:
+        rows = queryset.annotate(day=TruncDate(timestamp)).values('course_id', 'day').annotate(total=Count('id'))
+        for row in rows.order_by():
+            cells[(row['course_id'], row['day'])][column] = row['total']
+
+    with transaction.atomic():
+        EnrollmentDailyRollup.objects.all().delete()
+        EnrollmentDailyRollup.objects.bulk_create([
+            EnrollmentDailyRollup(course_id=course_id, day=day, **columns)
+            for (course_id, day), columns in cells.items()
+        ], batch_size=batch_size)
+    return len(cells)
+
+
+def period_start(day, period):
+    if period == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(day, period):
+    if period == 'week':
+        return day + datetime.timedelta(days=7)
+    if period == 'month':
+        return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return day + datetime.timedelta(days=1)
+
+
+def default_start(end, period):
+    start = period_start(end, period)
+    for _ in range(DEFAULT_PERIOD_COUNTS[period] - 1):
+        start = period_start(start - datetime.timedelta(days=1), period)
+    return start
+
+
+def period_count(start, end, period):
+    # Number of buckets enrollment_series returns for start..end.
+    start, end = period_start(start, period), period_start(end, period)
+    if period == 'week':
+        return (end - start).days // 7 + 1
+    if period == 'month':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    return (end - start).days + 1
+
+
+def enrollment_series(rollups, period, start, end):
+    # Sums rollup rows per day/week/month bucket in the database (the scan is
+    # bounded by days x courses) and fills empty buckets with zeros.
+    rows = rollups.filter(day__gte=start, day__lte=end).annotate(
+        period=Trunc('day', period),
+    ).values('period').annotate(**{column: Sum(column) for column in ROLLUP_COLUMNS}).order_by('period')
+    totals = {row['period']: row for row in rows}
+
+    series = []
+    bucket = period_start(start, period)
+    while bucket <= end:
+        row = totals.get(bucket, {})
+        series.append({
+            'period': bucket,
+            **{column: row.get(column) or 0 for column in ROLLUP_COLUMNS},
+        })
+        bucket = next_period(bucket, period)
+    return series
@@ -0,0 +1,55 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+
+class AsyncDispatchMixin:
+    # Lets DRF views and viewsets mix `async def` handlers with sync ones.
+    # Authentication, permissions, throttling and sync handlers run through
+    # sync_to_async; async handlers run on the event loop under ASGI (and via
+    # async_to_sync under WSGI).
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+        markcoroutinefunction(view)
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+_DONE = object()
+
+
+async def aiterate(iterable):
+    # Async view of a sync iterator (e.g. rows streamed from a queryset). Each
+    # item is produced in the request's sync thread, where its connection lives.
+    iterator = iter(iterable)
+    next_item = sync_to_async(next, thread_sensitive=True)
+    while True:
+        item = await next_item(iterator, _DONE)
+        if item is _DONE:
+            return
+        yield item
@@ -0,0 +1,174 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.http import http_date, parse_http_date_safe, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def cache_is_shared():
+    # LocMemCache keeps a separate copy per process: bumping a version there
+    # doesn't invalidate what other workers hold.
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def cache_timeout(timeout):
+    if cache_is_shared():
+        return timeout
+    return min(timeout, getattr(settings, 'LMS_LOCAL_CACHE_TIMEOUT', 5))
+
+
+def _version_key(namespace):
+    return f'lms:{namespace}:version'
+
+
+def get_cache_version(namespace):
+    return cache.get_or_set(_version_key(namespace), 1, timeout=None)
+
+
+def incr_persistent(key, delta=1):
+    # BaseCache.incr (file and database caches) re-sets the key with the default
+    # timeout; counters stored without one must keep it.
+    value = cache.incr(key, delta)
+    if type(caches[DEFAULT_CACHE_ALIAS]).incr is BaseCache.incr:
+        cache.touch(key, None)
+    return value
+
+
+def bump_cache_version(namespace):
+    # Old entries become unreachable and age out via their own timeout.
+    try:
+        incr_persistent(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), 2, timeout=None)
+    cache.set(f'lms:{namespace}:changed_at', int(time.time()), timeout=None)
+
+
+def versioned_cache_key(namespace, suffix):
+    return f'lms:{namespace}:v{get_cache_version(namespace)}:{suffix}'
+
+
+def incr_counter(key, delta=1):
+    if not cache.add(key, delta, timeout=None):
+        try:
+            incr_persistent(key, delta)
+        except ValueError:
+            cache.set(key, delta, timeout=None)
+
+
+def record_cache_event(namespace, event):
+    incr_counter(f'lms:stats:{namespace}:{event}')
+
+
+def get_cache_stats(namespaces):
+    stats = {}
+    for namespace in namespaces:
+        hits = cache.get(f'lms:stats:{namespace}:hit', 0)
+        misses = cache.get(f'lms:stats:{namespace}:miss', 0)
+        stats[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+            'version': get_cache_version(namespace),
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    # Caches serialized payloads per action, URL kwargs, query params and scope,
+    # and answers conditional requests with ETag / Last-Modified.
+    cache_namespace = None
+    cache_timeout = 300
+    cached_actions = ['list', 'retrieve']
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_scope(self, request):
+        return 'public'
+
+    def personalize_cached_data(self, request, data):
+        # Returns the data for this caller and a string folded into the ETag.
+        return data, ''
+
+    def get_last_modified(self, data):
+        return None
+
+    def get_response_cache_key(self, request):
+        params = '&'.join(f'{name}={value}' for name, value in sorted(request.query_params.lists()))
+        kwargs = ','.join(f'{name}={value}' for name, value in sorted(self.kwargs.items()))
+        suffix = f'{self.action}:{kwargs}:{params}:{self.get_cache_scope(request)}'
+        return versioned_cache_key(self.cache_namespace, hashlib.md5(suffix.encode()).hexdigest())
+
+    def is_cached_action(self):
+        return self.action in self.cached_actions and self.cache_namespace is not None
+
+    def get_cached_entry(self, request):
+        cache_key = self.get_response_cache_key(request)
+        entry = cache.get(cache_key)
+        record_cache_event(self.cache_namespace, 'miss' if entry is None else 'hit')
+        return cache_key, entry
+
+    def set_cached_entry(self, cache_key, data):
+        changed_at = cache.get(f'lms:{self.cache_namespace}:changed_at') or int(time.time())
+        last_modified = self.get_last_modified(data)
+        entry = {
+            'data': data,
+            'last_modified': max(last_modified or 0, changed_at),
+        }
+        cache.set(cache_key, entry, cache_timeout(self.cache_timeout))
+        return entry
+
+    def cached_response(self, view_func, request, *args, **kwargs):
+        if not self.is_cached_action():
+            return view_func(request, *args, **kwargs)
+
+        cache_key, entry = self.get_cached_entry(request)
+        if entry is None:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = self.set_cached_entry(cache_key, response.data)
+        return self.cached_entry_response(request, cache_key, entry)
+
+    async def acached_response(self, view_func, request, *args, **kwargs):
+        # Same flow for `async def` handlers; cache and personalization steps may block.
+        if not self.is_cached_action():
+            return await view_func(request, *args, **kwargs)
+
+        cache_key, entry = await sync_to_async(self.get_cached_entry)(request)
+        if entry is None:
+            response = await view_func(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = await sync_to_async(self.set_cached_entry)(cache_key, response.data)
+        return await sync_to_async(self.cached_entry_response)(request, cache_key, entry)
+
+    def cached_entry_response(self, request, cache_key, entry):
+        data, etag_extra = self.personalize_cached_data(request, entry['data'])
+        etag = quote_etag(hashlib.md5(f'{cache_key}:{etag_extra}'.encode()).hexdigest())
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(entry['last_modified']),
+        }
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if '*' in etags or etag in etags:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        else:
+            if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            if if_modified_since and entry['last_modified'] <= if_modified_since:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(data, headers=headers)
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core import checks
+
+from .cache import cache_is_shared
+from .routers import replica_alias
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [checks.Warning(
+        'The default cache is local to each process, so cache invalidation only reaches one worker.',
+        hint='Set CACHE_BACKEND to a cache shared by every worker (e.g. RedisCache or PyMemcacheCache).',
+        id='lms_core.W001',
+    )]
+
+
+@checks.register(checks.Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    # Read-your-writes pins live in the default cache; a per-process cache would
+    # only pin the client on the worker that served its write.
+    if replica_alias() is None or cache_is_shared():
+        return []
+    return [checks.Error(
+        'A read replica is configured but the default cache is local to each process, '
+        'so other workers may read a client\'s own writes from the lagging replica.',
+        hint='Set CACHE_BACKEND to a cache shared by every worker (e.g. RedisCache or PyMemcacheCache).',
+        id='lms_core.E002',
+    )]
+
+
+def check_asgi_connections(databases=None):
+    # Run by asgi.py: sync ORM calls there go through sync_to_async threads, and
+    # each thread would hold its own persistent connection for CONN_MAX_AGE.
+    databases = settings.DATABASES if databases is None else databases
+    return [checks.Error(
+        f'DATABASES[{alias!r}] keeps persistent connections (CONN_MAX_AGE={database["CONN_MAX_AGE"]}) under ASGI.',
+        hint='Set DB_CONN_MAX_AGE=0, and DB_POOL=True on Postgres.',
+        id='lms_core.E001',
+    ) for alias, database in databases.items() if database.get('CONN_MAX_AGE', 0) != 0]
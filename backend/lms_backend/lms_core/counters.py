@@ -0,0 +1,96 @@
+import asyncio
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Course, Enrollment, DashboardCounter
+from authentication.models import User
+
+
+DASHBOARD_COUNTER_NAMES = [
+    'total_users', 'total_students', 'total_instructors',
+    'total_courses', 'total_enrollments', 'published_courses', 'active_enrollments',
+]
+
+def counters_enabled():
+    return getattr(settings, 'LMS_DASHBOARD_COUNTERS', False)
+
+
+def dashboard_aggregates():
+    # One conditional-aggregate query per table.
+    return [
+        (User.objects, {
+            'total_users': Count('id'),
+            'total_students': Count('id', filter=Q(role='student')),
+            'total_instructors': Count('id', filter=Q(role='instructor')),
+        }),
+        (Course.objects, {
+            'total_courses': Count('id'),
+            'published_courses': Count('id', filter=Q(is_published=True)),
+        }),
+        (Enrollment.objects, {
+            'total_enrollments': Count('id'),
+            'active_enrollments': Count('id', filter=Q(status='active')),
+        }),
+    ]
+
+
+def aggregate_dashboard_stats():
+    stats = {}
+    for queryset, aggregates in dashboard_aggregates():
+        stats.update(queryset.aggregate(**aggregates))
+    return stats
+
+
+async def aaggregate_dashboard_stats():
+    results = await asyncio.gather(*[
+        queryset.aaggregate(**aggregates) for queryset, aggregates in dashboard_aggregates()
+    ])
+    stats = {}
+    for result in results:
+        stats.update(result)
+    return stats
+
+
+def counter_names(instance):
+    # Counters a single row contributes to; must mirror aggregate_dashboard_stats.
+    values = instance.__dict__
+    if isinstance(instance, User):
+        names = ['total_users']
+        if values.get('role') == 'student':
+            names.append('total_students')
+        elif values.get('role') == 'instructor':
+            names.append('total_instructors')
+    elif isinstance(instance, Course):
+        names = ['total_courses']
+        if values.get('is_published'):
+            names.append('published_courses')
+    elif isinstance(instance, Enrollment):
+        names = ['total_enrollments']
+        if values.get('status') == 'active':
+            names.append('active_enrollments')
+    else:
+        names = []
+    return names
+
+
+def apply_counter_deltas(deltas):
+    for name, delta in deltas.items():
+        if delta:
+            DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def read_dashboard_counters():
+    counters = dict(DashboardCounter.objects.values_list('name', 'value'))
+    if any(name not in counters for name in DASHBOARD_COUNTER_NAMES):
+        return reconcile_dashboard_counters()
+    return {name: counters[name] for name in DASHBOARD_COUNTER_NAMES}
+
+
+def reconcile_dashboard_counters():
+    with transaction.atomic():
+        stats = aggregate_dashboard_stats()
+        for name, value in stats.items():
+            DashboardCounter.objects.update_or_create(name=name, defaults={'value': value})
+    return stats
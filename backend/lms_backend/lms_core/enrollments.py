@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Course, Enrollment
+from .cache import bump_cache_version
+from .counters import counters_enabled, apply_counter_deltas
+from .analytics import rollup_state, rollup_keys, apply_rollup_deltas
+from authentication.models import User
+
+
+@transaction.atomic
+def bulk_enroll(pairs, user, batch_size=None):
+    # Validates every (student, course) pair with set-based queries and inserts
+    # the new ones in batches; returns one result dict per input pair.
+    batch_size = batch_size or getattr(settings, 'LMS_BULK_ENROLLMENT_BATCH_SIZE', 500)
+    student_ids = {student for student, course in pairs}
+    course_ids = {course for student, course in pairs}
+    
+    students = set(User.objects.filter(
+        pk__in=student_ids, role='student', is_active=True
+    ).values_list('pk', flat=True))
+    course_instructors = dict(Course.objects.filter(pk__in=course_ids).values_list('pk', 'instructor_id'))
+    existing = set(Enrollment.objects.filter(
+        student_id__in=students, course_id__in=course_instructors
+    ).values_list('student_id', 'course_id'))
+    
+    results = []
+    pending = []
+    seen = set()
+    for student, course in pairs:
+        result = {'student': student, 'course': course}
+        errors = []
+        if student not in students:
+            errors.append('Student does not exist or is not an active student')
+        if course not in course_instructors:
+            errors.append('Course does not exist')
+        elif user.role == 'instructor' and course_instructors[course] != user.pk:
+            errors.append('You can only enroll students in your own courses')
+        
+        if errors:
+            result.update(status='invalid', errors=errors)
+        elif (student, course) in existing:
+            result['status'] = 'already_enrolled'
+        elif (student, course) in seen:
+            result['status'] = 'duplicate'
+        else:
+            pending.append((result, Enrollment(student_id=student, course_id=course)))
+        seen.add((student, course))
+        results.append(result)
+    
+    # A concurrent request may insert a pair after the check above; the conflict
+    # clause skips those rows, so only ids that were actually written count.
+    Enrollment.objects.bulk_create([enrollment for _, enrollment in pending], batch_size=batch_size, ignore_conflicts=True)
+    pending_ids = [enrollment.pk for _, enrollment in pending]
+    inserted = set()
+    for start in range(0, len(pending_ids), batch_size):
+        inserted.update(Enrollment.objects.filter(pk__in=pending_ids[start:start + batch_size]).values_list('pk', flat=True))
+    new_enrollments = []
+    for result, enrollment in pending:
+        if enrollment.pk in inserted:
+            result['status'] = 'created'
+            new_enrollments.append(enrollment)
+        else:
+            result['status'] = 'already_enrolled'
+    
+    # bulk_create skips signals, so counters, rollups and caches are updated here.
+    if new_enrollments:
+        apply_rollup_deltas(Counter(
+            key for enrollment in new_enrollments for key in rollup_keys(rollup_state(enrollment))
+        ))
+        if counters_enabled():
+            apply_counter_deltas({
+                'total_enrollments': len(new_enrollments),
+                'active_enrollments': len(new_enrollments),
+            })
+        transaction.on_commit(lambda: bump_cache_version('courses'))
+    
+    return results
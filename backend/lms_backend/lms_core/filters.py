@@ -0,0 +1,82 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Course
+from .search import search_courses
+
+
+class CourseFilterBackend(BaseFilterBackend):
+    ordering_param = 'ordering'
+    default_ordering = ('-created_at', '-id')
+    
+    filter_fields = {
+        'category': ('category', serializers.UUIDField()),
+        'instructor': ('instructor', serializers.UUIDField()),
+        'difficulty': ('difficulty', serializers.ChoiceField(choices=Course.DIFFICULTY_CHOICES)),
+        'is_published': ('is_published', serializers.BooleanField()),
+        'min_price': ('price__gte', serializers.DecimalField(max_digits=10, decimal_places=2)),
+        'max_price': ('price__lte', serializers.DecimalField(max_digits=10, decimal_places=2)),
+        'min_duration': ('duration__gte', serializers.IntegerField(min_value=0)),
+        'max_duration': ('duration__lte', serializers.IntegerField(min_value=0)),
+    }
+    
+    ordering_fields = {
+        'price': 'price',
+        'created_at': 'created_at',
+        'enrollment_count': 'annotated_enrollment_count',
+    }
+    
+    def get_filters(self, request):
+        filters = {}
+        errors = {}
+        for param, (lookup, field) in self.filter_fields.items():
+            if param not in request.query_params:
+                continue
+            try:
+                filters[lookup] = field.run_validation(request.query_params[param])
+            except ValidationError as exc:
+                errors[param] = exc.detail
+        if errors:
+            raise ValidationError(errors)
+        return filters
+    
+    def get_requested_ordering(self, request):
+        param = request.query_params.get(self.ordering_param, '').strip()
+        if not param:
+            return None
+        ordering = []
+        for term in param.split(','):
+            term = term.strip()
+            name = term.lstrip('-')
+            if name not in self.ordering_fields:
+                raise ValidationError({
+                    self.ordering_param: f"Unsupported ordering '{term}'. Choose from: {', '.join(self.ordering_fields)}"
+                })
+            ordering.append(('-' if term.startswith('-') else '') + self.ordering_fields[name])
+        # Unique tie-breaker so cursor pagination stays stable.
+        return tuple(ordering) + ('-id',)
+    
+    def get_ordering(self, request, queryset, view):
+        # Also the cursor ordering. Ranked search positions are unique, so
+        # pages follow relevance without a tie-breaker.
+        requested = self.get_requested_ordering(request)
+        if requested:
+            return requested
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank',)
+        return self.default_ordering
+    
+    def filter_queryset(self, request, queryset, view):
+        queryset = queryset.filter(**self.get_filters(request))
+        search = getattr(view, 'search_query', '')
+        if search and getattr(view, 'action', None) == 'list':
+            # Ranked last, so its result limit only counts courses the caller can see.
+            queryset = search_courses(queryset, search)
+        ordering = self.get_requested_ordering(request)
+        if ordering:
+            return queryset.order_by(*ordering)
+        # Keep search relevance ordering; otherwise add the unique tie-breaker.
+        if not queryset.query.order_by:
+            return queryset.order_by(*self.default_ordering)
+        return queryset
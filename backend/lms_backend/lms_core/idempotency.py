@@ -0,0 +1,66 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .exceptions import Conflict
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IN_PROGRESS = 'in-progress'
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}:{request.path}:{body}'.encode()).hexdigest()
+
+
+def idempotent(request, handler):
+    # Replays the stored response for a repeated Idempotency-Key instead of running handler again.
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler()
+    
+    ttl = getattr(settings, 'LMS_IDEMPOTENCY_TTL', 60 * 60 * 24)
+    user_id = request.user.pk if request.user.is_authenticated else 'anonymous'
+    cache_key = 'lms:idempotency:' + hashlib.sha256(f'{user_id}:{key}'.encode()).hexdigest()
+    fingerprint = _fingerprint(request)
+    
+    if not cache.add(cache_key, {'state': IN_PROGRESS, 'fingerprint': fingerprint}, ttl):
+        stored = cache.get(cache_key)
+        if stored is not None:
+            if stored['fingerprint'] != fingerprint:
+                return Response(
+                    {'detail': f'{IDEMPOTENCY_HEADER} was already used with a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if stored['state'] == IN_PROGRESS:
+                raise Conflict(f'A request with this {IDEMPOTENCY_HEADER} is still being processed')
+            response = Response(stored['data'], status=stored['status'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        cache.add(cache_key, {'state': IN_PROGRESS, 'fingerprint': fingerprint}, ttl)
+    
+    try:
+        response = handler()
+    except Conflict as exc:
+        cache.set(cache_key, {
+            'state': 'done', 'fingerprint': fingerprint,
+            'data': {'detail': exc.detail}, 'status': exc.status_code,
+        }, ttl)
+        raise
+    except Exception:
+        cache.delete(cache_key)
+        raise
+    
+    if response.status_code < 500:
+        cache.set(cache_key, {
+            'state': 'done', 'fingerprint': fingerprint,
+            'data': response.data, 'status': response.status_code,
+        }, ttl)
+    else:
+        cache.delete(cache_key)
+    return response
@@ -0,0 +1,153 @@
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .storage import VARIANTS_DIR
+
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def variant_widths():
+    return getattr(settings, 'LMS_IMAGE_VARIANT_WIDTHS', [320, 640, 1280])
+
+
+def variant_formats():
+    return getattr(settings, 'LMS_IMAGE_VARIANT_FORMATS', ['webp', 'jpg'])
+
+
+def variant_sources():
+    # Upload directories whose images get variants (Course.thumbnail, User.profile_image).
+    return tuple(getattr(settings, 'LMS_IMAGE_VARIANT_SOURCES', ['course_thumbnails/', 'profiles/']))
+
+
+def is_variant_source(name):
+    # Variants are never sources themselves, or each could spawn another level.
+    return not name.startswith(VARIANTS_DIR) and name.startswith(variant_sources())
+
+
+VARIANT_NAME_RE = re.compile(rf'^{VARIANTS_DIR}(?P<source>.+)/(?P<width>\d+)w\.(?P<fmt>\w+)$')
+
+
+def variant_name(name, width, fmt):
+    return f'{VARIANTS_DIR}{name}/{width}w.{fmt}'
+
+
+def ensure_variant(name):
+    # Renders a missing variant on demand; False if `name` isn't a valid variant of an existing image.
+    match = VARIANT_NAME_RE.match(name)
+    if match is None:
+        return False
+    source, width, fmt = match['source'], int(match['width']), match['fmt']
+    if not is_variant_source(source) or width not in variant_widths() or fmt not in variant_formats():
+        return False
+    if not default_storage.exists(source):
+        return False
+    try:
+        variant_pool.submit(source).result()
+    except OSError:
+        return False
+    return default_storage.exists(name)
+
+
+def image_srcset(name, request=None):
+    # {format: "url 320w, url 640w, ..."}; URLs are absolute when a request is given, like ImageField.
+    if not name:
+        return None
+    srcset = {}
+    for fmt in variant_formats():
+        entries = []
+        for width in variant_widths():
+            url = default_storage.url(variant_name(name, width, fmt))
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            entries.append(f'{url} {width}w')
+        srcset[fmt] = ', '.join(entries)
+    return srcset
+
+
+def render_variants(source, widths, formats):
+    # Decodes the source once (JPEGs at a reduced DCT scale) and downsizes
+    # progressively from the largest width; never upscales.
+    with Image.open(source) as image:
+        largest = max(widths)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+        else:
+            image = image.convert('RGB')
+        
+        for width in sorted(widths, reverse=True):
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            for fmt in formats:
+                pil_format, options = FORMATS[fmt]
+                output = image
+                if pil_format == 'JPEG' and image.mode == 'RGBA':
+                    output = Image.new('RGB', image.size, (255, 255, 255))
+                    output.paste(image, mask=image.getchannel('A'))
+                buffer = BytesIO()
+                output.save(buffer, pil_format, **options)
+                yield width, fmt, buffer.getvalue()
+
+
+def generate_variants(name):
+    widths, formats = variant_widths(), variant_formats()
+    missing = [
+        (width, fmt) for width in widths for fmt in formats
+        if not default_storage.exists(variant_name(name, width, fmt))
+    ]
+    if not missing:
+        return
+    with default_storage.open(name, 'rb') as source:
+        for width, fmt, data in render_variants(source, sorted({w for w, _ in missing}), sorted({f for _, f in missing})):
+            if (width, fmt) in missing:
+                default_storage.save(variant_name(name, width, fmt), ContentFile(data))
+
+
+class VariantWorkerPool:
+    # One job per source image at a time; callers for the same image share it.
+
+    def __init__(self):
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name):
+        with self._lock:
+            future = self._pending.get(name)
+            if future is None:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'LMS_IMAGE_WORKERS', 2),
+                        thread_name_prefix='image-variants',
+                    )
+                future = self._executor.submit(self._run, name)
+                self._pending[name] = future
+            return future
+
+    def _run(self, name):
+        try:
+            generate_variants(name)
+        except Exception:
+            logger.exception('Could not generate image variants for %s', name)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+
+
+variant_pool = VariantWorkerPool()
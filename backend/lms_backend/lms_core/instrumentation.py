@@ -0,0 +1,174 @@
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework import serializers
+
+from .cache import incr_counter
+
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS = ('count', 'total_us', 'db_us', 'queries', 'serializer_us', 'duplicates')
+
+_ROUTES_KEY = 'lms:perf:routes'
+
+_current = contextvars.ContextVar('lms_request_metrics', default=None)
+
+
+def _metric_key(route, field):
+    return f'lms:perf:{hashlib.md5(route.encode()).hexdigest()}:{field}'
+
+
+def instrumentation_enabled():
+    return getattr(settings, 'LMS_PERF_INSTRUMENTATION', False)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.db_time = 0.0
+        self.queries = 0
+        self.statements = Counter()
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook; statements are compared without params,
+        # so the same query issued once per row shows up as a duplicate.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def capture(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def duplicates(self):
+        threshold = getattr(settings, 'LMS_PERF_DUPLICATE_THRESHOLD', 3)
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+    def server_timing(self):
+        entries = [
+            f'total;dur={self.duration * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+        ]
+        duplicates = self.duplicates()
+        if duplicates:
+            entries.append(f'dupq;desc="{len(duplicates)} repeated statements"')
+        return ', '.join(entries)
+
+    def as_log_record(self, request, response):
+        match = getattr(request, 'resolver_match', None)
+        return {
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'status': response.status_code,
+            'duration_ms': round(self.duration * 1000, 2),
+            'db_queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'duplicate_queries': [{'sql': sql, 'count': count} for sql, count in self.duplicates()],
+        }
+
+
+def start_request_metrics():
+    metrics = RequestMetrics()
+    _current.set(metrics)
+    return metrics
+
+
+def finish_request_metrics(metrics, request, response):
+    metrics.finish()
+    response['Server-Timing'] = metrics.server_timing()
+    record = metrics.as_log_record(request, response)
+    if record['duplicate_queries']:
+        logger.warning(json.dumps(record))
+    else:
+        logger.info(json.dumps(record))
+    if record['route'] and random.random() < getattr(settings, 'LMS_PERF_SAMPLE_RATE', 0.0):
+        record_sample(f"{request.method} {record['route']}", metrics)
+
+
+def record_sample(route, metrics):
+    routes = cache.get(_ROUTES_KEY) or []
+    if route not in routes:
+        cache.set(_ROUTES_KEY, routes + [route], timeout=None)
+    values = {
+        'count': 1,
+        'total_us': int(metrics.duration * 1e6),
+        'db_us': int(metrics.db_time * 1e6),
+        'queries': metrics.queries,
+        'serializer_us': int(metrics.serializer_time * 1e6),
+        'duplicates': 1 if metrics.duplicates() else 0,
+    }
+    for field, value in values.items():
+        incr_counter(_metric_key(route, field), value)
+
+
+def get_performance_stats():
+    routes = cache.get(_ROUTES_KEY) or []
+    keys = [_metric_key(route, field) for route in routes for field in METRIC_FIELDS]
+    values = cache.get_many(keys)
+    stats = {}
+    for route in routes:
+        row = {field: values.get(_metric_key(route, field), 0) for field in METRIC_FIELDS}
+        count = row['count']
+        if not count:
+            continue
+        stats[route] = {
+            'samples': count,
+            'avg_ms': round(row['total_us'] / count / 1000, 2),
+            'avg_db_ms': round(row['db_us'] / count / 1000, 2),
+            'avg_queries': round(row['queries'] / count, 2),
+            'avg_serializer_ms': round(row['serializer_us'] / count / 1000, 2),
+            'requests_with_duplicate_queries': row['duplicates'],
+        }
+    return dict(sorted(stats.items(), key=lambda item: item[1]['avg_ms'], reverse=True))
+
+
+def reset_performance_stats():
+    routes = cache.get(_ROUTES_KEY) or []
+    cache.delete_many([_metric_key(route, field) for route in routes for field in METRIC_FIELDS] + [_ROUTES_KEY])
+
+
+_serializer_data = serializers.BaseSerializer.data
+
+
+@property
+def _timed_serializer_data(self):
+    # Outermost `.data` only, so nested serializers aren't counted twice.
+    metrics = _current.get()
+    if metrics is None or metrics.serializer_depth:
+        return _serializer_data.fget(self)
+    metrics.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        return _serializer_data.fget(self)
+    finally:
+        metrics.serializer_time += time.perf_counter() - start
+        metrics.serializer_depth -= 1
+
+
+def instrument_serializers():
+    serializers.BaseSerializer.data = _timed_serializer_data
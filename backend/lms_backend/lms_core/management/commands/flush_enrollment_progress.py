@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from lms_core.progress import flush_interval, flush_progress
+
+
+class Command(BaseCommand):
+    help = 'Write buffered enrollment progress from the cache to the enrollments table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help='Keep flushing every interval instead of draining once')
+        parser.add_argument('--interval', type=float, default=None, help='Seconds between flushes (default: LMS_PROGRESS_FLUSH_INTERVAL)')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or flush_interval()
+        total = 0
+        while options['loop']:
+            written = flush_progress(options['batch_size'])
+            total += written
+            if written:
+                self.stdout.write(f'written={written}')
+            time.sleep(interval)
+        # Draining also writes the generation still being filled.
+        total += flush_progress(options['batch_size'], include_current=True)
+        self.stdout.write(self.style.SUCCESS(f'Progress flushed: {total} enrollments written'))
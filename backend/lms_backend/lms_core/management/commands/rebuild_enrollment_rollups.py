@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from lms_core.analytics import rebuild_enrollment_rollups
+
+
+class Command(BaseCommand):
+    help = 'Backfill the daily per-course enrollment rollups from the enrollments table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = rebuild_enrollment_rollups(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} daily rollup rows'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from lms_core.models import Course
+from lms_core.search import search_backend, create_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text course search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        conn = connections[options['database']]
+        backend = search_backend(conn)
+        if backend is None:
+            self.stdout.write(self.style.WARNING(
+                f'{conn.vendor} has no search index; searches fall back to icontains filters'
+            ))
+            return
+        
+        with transaction.atomic(using=conn.alias):
+            create_search_index(conn)
+            rebuild_search_index(conn)
+        
+        count = Course.objects.using(conn.alias).count()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} courses ({backend})'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from lms_core.counters import reconcile_dashboard_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters table from the users, courses and enrollments tables'
+
+    def handle(self, *args, **options):
+        stats = reconcile_dashboard_counters()
+        for name, value in stats.items():
+            self.stdout.write(f'{name}: {value}')
+        self.stdout.write(self.style.SUCCESS('Dashboard counters reconciled'))
@@ -0,0 +1,98 @@
+import datetime
+import hashlib
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from authentication.models import User
+from lms_core.analytics import rebuild_enrollment_rollups
+from lms_core.cache import bump_cache_version
+from lms_core.counters import counters_enabled, reconcile_dashboard_counters
+from lms_core.models import Category, Course, Enrollment
+from lms_core.search import search_backend, create_search_index, rebuild_search_index
+from lms_core.seed import CATEGORY_NAMES, deferred_indexes, make_plan, seed_table, seeded_tables
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic dataset (users, categories, courses, enrollments) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--instructors', type=int, default=None, help='Default: 2%% of --users')
+        parser.add_argument('--categories', type=int, default=len(CATEGORY_NAMES))
+        parser.add_argument('--courses', type=int, default=500)
+        parser.add_argument('--enrollments', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--days', type=int, default=365, help='Spread creation dates over this many days')
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=None,
+                            help='Last day of the window (default: today); pin it for byte-identical reruns')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for course, instructor and category popularity')
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Rows per executemany insert transaction')
+        parser.add_argument('--workers', type=int, default=1, help='Processes building and inserting chunks')
+        parser.add_argument('--password', default='password123', help='Password shared by every seeded user')
+        parser.add_argument('--email-domain', default='seed.lms.test')
+
+    def handle(self, *args, **options):
+        instructors = options['instructors']
+        if instructors is None:
+            instructors = max(1, options['users'] // 50)
+        students = options['users'] - instructors
+        if instructors < 1 or students < 1 or options['categories'] < 1 or options['courses'] < 1:
+            raise CommandError('Need at least one instructor, student, category and course')
+        if options['enrollments'] > students * options['courses'] // 2:
+            raise CommandError('Too many enrollments for the number of students and courses')
+        if User.objects.filter(email__endswith=f"@{options['email_domain']}").exists() or \
+                Category.objects.filter(name__in=CATEGORY_NAMES[:options['categories']]).exists():
+            raise CommandError('The database already has seeded users or categories; seed an empty database')
+
+        end_date = options['end_date'] or timezone.localdate()
+        end = timezone.make_aware(datetime.datetime.combine(end_date, datetime.time()), datetime.timezone.utc)
+        # One hash for every user, salted from the seed: PBKDF2 per row would dominate the run.
+        salt = hashlib.sha256(f"{options['seed']}:salt".encode()).hexdigest()[:22]
+        plan = make_plan(
+            seed=options['seed'], users=options['users'], instructors=instructors,
+            categories=options['categories'], courses=options['courses'], enrollments=options['enrollments'],
+            days=options['days'], end=end, password_hash=make_password(options['password'], salt),
+            chunk_size=options['chunk_size'], zipf_exponent=options['zipf'], email_domain=options['email_domain'],
+        )
+
+        # Secondary indexes are only dropped for the load when no other data depends on them.
+        empty = not any(model.objects.exists() for model in (User, Category, Course, Enrollment))
+        total_rows = 0
+        started = time.perf_counter()
+        with deferred_indexes(seeded_tables() if empty else []) as indexes:
+            for table in ('users', 'categories', 'courses', 'enrollments'):
+                table_started = time.perf_counter()
+                rows = 0
+                for written in seed_table(plan, table, options['workers']):
+                    rows += written
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'{table}: {rows}/{plan[table]}')
+                elapsed = time.perf_counter() - table_started
+                total_rows += rows
+                self.stdout.write(f'{table}: {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
+            index_started = time.perf_counter()
+        if indexes:
+            self.stdout.write(f'Recreated {len(indexes)} indexes in {time.perf_counter() - index_started:.1f}s')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Inserted {total_rows} rows in {elapsed:.1f}s ({total_rows / elapsed:,.0f} rows/s)')
+
+        # Raw executemany inserts skip signals: rebuild everything they would have maintained.
+        derived_started = time.perf_counter()
+        if search_backend(connection):
+            with transaction.atomic():
+                create_search_index(connection)
+                rebuild_search_index(connection)
+        if counters_enabled():
+            reconcile_dashboard_counters()
+        rebuild_enrollment_rollups()
+        for namespace in ('courses', 'categories'):
+            bump_cache_version(namespace)
+        self.stdout.write(f'Rebuilt search index, counters and rollups in {time.perf_counter() - derived_started:.1f}s')
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {plan['users']} users, {plan['categories']} categories, {plan['courses']} courses "
+            f"and {plan['enrollments']} enrollments (seed {plan['seed']}, password '{options['password']}')"
+        ))
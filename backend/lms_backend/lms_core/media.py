@@ -0,0 +1,155 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .images import ensure_variant
+
+
+# Names written by ContentHashedStorageMixin (and variants derived from them) never change content.
+HASHED_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})\.\w+(?:/|$)')
+
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+
+class RangeFile:
+    # Reads at most `length` bytes from the current position. Exposes fileno() so
+    # wsgi.file_wrapper (e.g. gunicorn) can still sendfile() the range: it starts at
+    # the descriptor's offset and stops at Content-Length.
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def media_etag(name, stat):
+    match = HASHED_NAME_RE.search(name)
+    if match:
+        suffix = name[match.end():]
+        return f'"{match["digest"]}{"-" + suffix.replace("/", "-") if suffix else ""}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def cache_control(name):
+    if HASHED_NAME_RE.search(name):
+        return 'public, max-age=31536000, immutable'
+    return f"public, max-age={getattr(settings, 'LMS_MEDIA_MAX_AGE', 3600)}"
+
+
+def parse_range(header, size):
+    # Single byte ranges only; anything else, including a range that ends
+    # before it starts, is invalid and answered with the full file.
+    match = RANGE_RE.match(header.strip())
+    if match is None or (not match['start'] and not match['end']):
+        return None
+    if match['start']:
+        start = int(match['start'])
+        if match['end'] and int(match['end']) < start:
+            return None
+        end = min(int(match['end']), size - 1) if match['end'] else size - 1
+    else:
+        start = max(size - int(match['end']), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return 'unsatisfiable'
+    return start, end
+
+
+def is_not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(if_modified_since and int(last_modified) <= if_modified_since)
+
+
+def range_applies(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return bool(if_range_date and int(last_modified) <= if_range_date)
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        file_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+    except NotImplementedError:
+        # Remote storages serve their own URLs.
+        return HttpResponseRedirect(default_storage.url(path))
+    
+    if not os.path.isfile(file_path) and not ensure_variant(path):
+        raise Http404
+    stat = os.stat(file_path)
+    etag = media_etag(path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    
+    if is_not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+    
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    offload = getattr(settings, 'LMS_MEDIA_OFFLOAD', '')
+    if offload or request.method == 'HEAD':
+        # The front server reads the file (and handles Range) itself.
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if offload == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = getattr(settings, 'LMS_MEDIA_ACCEL_PREFIX', '/protected-media/') + path
+        elif offload == 'x-sendfile':
+            response['X-Sendfile'] = file_path
+        else:
+            response['Content-Length'] = stat.st_size
+        return response
+    
+    byte_range = None
+    if 'Range' in request.headers and range_applies(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.headers['Range'], stat.st_size)
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    
+    file = open(file_path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type, headers=headers)
+    
+    start, end = byte_range
+    response = FileResponse(RangeFile(file, start, end - start + 1), status=206, content_type=content_type, headers=headers)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
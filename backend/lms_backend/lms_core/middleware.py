@@ -0,0 +1,73 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import MiddlewareNotUsed
+
+from .routers import start_request, pin_to_primary, replica_alias
+from .instrumentation import (
+    instrumentation_enabled, instrument_serializers, start_request_metrics, finish_request_metrics
+)
+
+
+class ReplicaPinningMiddleware:
+    # Scopes replica routing to one request and pins a client that wrote to the
+    # primary for LMS_REPLICA_PIN_SECONDS, so it reads its own writes.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = start_request()
+        response = self.get_response(request)
+        if state.wrote and replica_alias() is not None:
+            pin_to_primary(request)
+        return response
+
+    async def __acall__(self, request):
+        state = start_request()
+        response = await self.get_response(request)
+        if state.wrote and replica_alias() is not None:
+            await sync_to_async(pin_to_primary)(request)
+        return response
+
+
+class PerformanceMiddleware:
+    # Wall time, DB queries/time, repeated statements and serializer time per
+    # request, reported in Server-Timing and one log line. When
+    # LMS_PERF_INSTRUMENTATION is off Django drops this middleware at startup.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not instrumentation_enabled():
+            raise MiddlewareNotUsed
+        instrument_serializers()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = start_request_metrics()
+        with metrics.capture():
+            response = self.get_response(request)
+        finish_request_metrics(metrics, request, response)
+        return response
+
+    async def __acall__(self, request):
+        metrics = start_request_metrics()
+        # Connections are per thread; queries run on the request's thread-sensitive executor.
+        capture = await sync_to_async(metrics.capture)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(capture.close)()
+        await sync_to_async(finish_request_metrics)(metrics, request, response)
+        return response
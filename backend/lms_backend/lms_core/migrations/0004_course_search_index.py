@@ -0,0 +1,76 @@
+from django.db import migrations
+
+
+# Frozen copies of the DDL and backfill in lms_core.search at the time of this
+# migration; later changes there must not alter what this migration does.
+SQLITE_CREATE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS course_search USING fts5(
+        course_id UNINDEXED, title, description, category_name, instructor_name,
+        tokenize = 'porter unicode61 remove_diacritics 2', prefix = '3'
+    )
+"""
+
+SQLITE_BACKFILL_SQL = [
+    'DELETE FROM course_search',
+    """
+    INSERT INTO course_search (course_id, title, description, category_name, instructor_name)
+    SELECT c.id, c.title, c.description, COALESCE(cat.name, ''), u.first_name || ' ' || u.last_name
+    FROM courses c
+    LEFT JOIN categories cat ON cat.id = c.category_id
+    INNER JOIN users u ON u.id = c.instructor_id
+    """,
+    "INSERT INTO course_search (course_search) VALUES ('optimize')",
+]
+
+POSTGRES_CREATE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS course_search (
+        course_id uuid PRIMARY KEY REFERENCES courses (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS course_search_document_gin ON course_search USING GIN (document)',
+]
+
+POSTGRES_BACKFILL_SQL = [
+    'DELETE FROM course_search',
+    """
+    INSERT INTO course_search (course_id, document)
+    SELECT c.id,
+        setweight(to_tsvector('english', c.title), 'A') ||
+        setweight(to_tsvector('english', COALESCE(cat.name, '')), 'B') ||
+        setweight(to_tsvector('english', u.first_name || ' ' || u.last_name), 'B') ||
+        setweight(to_tsvector('english', c.description), 'C')
+    FROM courses c
+    LEFT JOIN categories cat ON cat.id = c.category_id
+    INNER JOIN users u ON u.id = c.instructor_id
+    """,
+]
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = [SQLITE_CREATE_SQL, *SQLITE_BACKFILL_SQL]
+    elif vendor == 'postgresql':
+        statements = [*POSTGRES_CREATE_SQL, *POSTGRES_BACKFILL_SQL]
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS course_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0003_dashboard_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0005_course_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='dropped_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='EnrollmentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('enrolled', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('dropped', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='lms_core.course')),
+            ],
+            options={
+                'db_table': 'enrollment_daily_rollups',
+                'indexes': [models.Index(fields=['day'], name='enrollment_rollups_day_idx')],
+                'unique_together': {('course', 'day')},
+            },
+        ),
+    ]
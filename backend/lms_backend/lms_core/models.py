@@ -42,6 +42,19 @@ class Course(models.Model):
     class Meta:
         db_table = 'courses'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='courses_created_at_id_idx'),
+            models.Index(fields=['is_published', 'created_at'], name='courses_published_created_idx'),
+            models.Index(fields=['is_published', 'category', 'created_at'], name='courses_pub_category_idx'),
+            models.Index(fields=['is_published', 'difficulty', 'created_at'], name='courses_pub_difficulty_idx'),
+            models.Index(fields=['is_published', 'price'], name='courses_pub_price_idx'),
+            models.Index(fields=['is_published', 'duration'], name='courses_pub_duration_idx'),
+            models.Index(fields=['instructor', 'created_at'], name='courses_instructor_created_idx'),
+            models.Index(fields=['category', 'created_at'], name='courses_category_created_idx'),
+            models.Index(fields=['difficulty', 'created_at'], name='courses_difficulty_created_idx'),
+            models.Index(fields=['price'], name='courses_price_idx'),
+            models.Index(fields=['duration'], name='courses_duration_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -65,11 +78,45 @@ class Enrollment(models.Model):
     progress = models.IntegerField(default=0, help_text='Progress percentage')
     enrolled_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(blank=True, null=True)
+    dropped_at = models.DateTimeField(blank=True, null=True)
     
     class Meta:
         db_table = 'enrollments'
         unique_together = ('student', 'course')
         ordering = ['-enrolled_at']
+        indexes = [
+            models.Index(fields=['enrolled_at', 'id'], name='enrollments_enrolled_at_id_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.student.email} - {self.course.title}"
\ No newline at end of file
+        return f"{self.student.email} - {self.course.title}"
+
+
+class DashboardCounter(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'dashboard_counters'
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class EnrollmentDailyRollup(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    enrolled = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    dropped = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'enrollment_daily_rollups'
+        unique_together = ('course', 'day')
+        indexes = [
+            models.Index(fields=['day'], name='enrollment_rollups_day_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.course_id} {self.day}: +{self.enrolled} / {self.completed} completed / {self.dropped} dropped"
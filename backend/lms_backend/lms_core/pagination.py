@@ -0,0 +1,33 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Clients that don't ask for a page keep getting the plain list response.
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CourseCursorPagination(OptionalCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class EnrollmentCursorPagination(OptionalCursorPagination):
+    ordering = ('-enrolled_at', '-id')
+
+
+class CourseReportPagination(CourseCursorPagination):
+    max_page_size = 500
+
+
+class EnrollmentReportPagination(EnrollmentCursorPagination):
+    max_page_size = 500
@@ -0,0 +1,169 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Enrollment
+from .cache import cache_is_shared, incr_counter, incr_persistent
+
+
+# Progress ticks are buffered per generation: each flush closes the current
+# generation and writes the one closed by the previous flush, so no request is
+# still writing to the keys being read. A per-process cache can't buffer for
+# the other workers (or survive a restart), so ticks are then written through.
+GENERATION_KEY = 'lms:progress:generation'
+FLUSHED_KEY = 'lms:progress:flushed'
+FLUSH_LOCK_KEY = 'lms:progress:flush-lock'
+
+
+def flush_interval():
+    return getattr(settings, 'LMS_PROGRESS_FLUSH_INTERVAL', 10)
+
+
+def _owner_ttl():
+    return max(flush_interval() * 10, 300)
+
+
+# Buffered ticks never expire: they are deleted only once a flush has committed
+# them, however long it takes for one to run (the cache must not evict keys
+# without a TTL, e.g. Redis with a volatile-* maxmemory policy).
+BUFFER_TIMEOUT = None
+
+
+def _pending_key(generation, enrollment_id):
+    return f'lms:progress:g{generation}:pending:{enrollment_id}'
+
+
+def _seq_key(generation):
+    return f'lms:progress:g{generation}:seq'
+
+
+def _slot_key(generation, slot):
+    return f'lms:progress:g{generation}:slot:{slot}'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, timeout=None)
+
+
+def _owner_key(enrollment_id):
+    return f'lms:progress:owner:{enrollment_id}'
+
+
+def enrollment_owner(enrollment_id):
+    # (student_id, status) per enrollment, cached so ticks don't hit the table.
+    if not cache_is_shared():
+        return Enrollment.objects.filter(pk=enrollment_id).values_list('student_id', 'status').first()
+    key = _owner_key(enrollment_id)
+    owner = cache.get(key)
+    if owner is None:
+        owner = Enrollment.objects.filter(pk=enrollment_id).values_list('student_id', 'status').first()
+        if owner is None:
+            return None
+        cache.set(key, owner, _owner_ttl())
+    return owner
+
+
+def forget_enrollment_owner(enrollment_id):
+    cache.delete(_owner_key(enrollment_id))
+
+
+def _next_slot(generation):
+    key = _seq_key(generation)
+    if cache.add(key, 1, BUFFER_TIMEOUT):
+        return 1
+    try:
+        return incr_persistent(key)
+    except ValueError:
+        return _next_slot(generation)
+
+
+def buffer_progress(enrollment_id, progress):
+    # Keeps the highest value seen this generation; the first tick for an
+    # enrollment also appends it to the generation's slot log for the flusher.
+    generation = _generation()
+    key = _pending_key(generation, enrollment_id)
+    if cache.add(key, progress, BUFFER_TIMEOUT):
+        cache.set(_slot_key(generation, _next_slot(generation)), str(enrollment_id), BUFFER_TIMEOUT)
+        return
+    current = cache.get(key)
+    if current is None:
+        buffer_progress(enrollment_id, progress)
+    elif progress > current:
+        cache.set(key, progress, BUFFER_TIMEOUT)
+
+
+def record_progress(enrollment_id, progress):
+    if cache_is_shared():
+        buffer_progress(enrollment_id, progress)
+        maybe_flush_progress()
+    else:
+        Enrollment.objects.filter(pk=enrollment_id).update(progress=Greatest(F('progress'), Value(progress)))
+
+
+def complete_enrollment(enrollment_id):
+    # Saved through the model so dashboard counters and course caches follow.
+    with transaction.atomic():
+        enrollment = Enrollment.objects.select_for_update().filter(pk=enrollment_id).first()
+        if enrollment is None:
+            return None
+        if enrollment.status == 'active':
+            enrollment.progress = 100
+            enrollment.status = 'completed'
+            enrollment.completed_at = timezone.now()
+            enrollment.save(update_fields=['progress', 'status', 'completed_at'])
+    return enrollment
+
+
+def _read_generation(generation):
+    slots = cache.get_many([_slot_key(generation, slot) for slot in range(1, (cache.get(_seq_key(generation)) or 0) + 1)])
+    pending_keys = {_pending_key(generation, enrollment_id): enrollment_id for enrollment_id in set(slots.values())}
+    values = {pending_keys[key]: value for key, value in cache.get_many(list(pending_keys)).items()}
+    return values, [_seq_key(generation), *slots, *pending_keys]
+
+
+def flush_progress(batch_size=None, include_current=False):
+    # Writes buffered progress with one bulk UPDATE per batch; GREATEST keeps
+    # the stored value when it is already higher. Returns the rows written.
+    batch_size = batch_size or getattr(settings, 'LMS_PROGRESS_BATCH_SIZE', 500)
+    closed = _generation()
+    incr_counter(GENERATION_KEY)
+    last = closed if include_current else closed - 1
+    flushed = cache.get(FLUSHED_KEY) or 0
+    if flushed >= closed:
+        # The generation counter was evicted and restarted.
+        flushed = 0
+    progress = {}
+    consumed = []
+    for generation in range(flushed + 1, last + 1):
+        values, keys = _read_generation(generation)
+        consumed += keys
+        for enrollment_id, value in values.items():
+            progress[enrollment_id] = max(value, progress.get(enrollment_id, 0))
+
+    enrollments = [
+        Enrollment(pk=enrollment_id, progress=Greatest(F('progress'), Value(value)))
+        for enrollment_id, value in progress.items()
+    ]
+    with transaction.atomic():
+        # bulk_update skips signals; progress feeds no cached payloads or counters.
+        Enrollment.objects.bulk_update(enrollments, ['progress'], batch_size=batch_size)
+        # The buffer is dropped only once the rows are committed; if the write
+        # fails the next flush reads it again (GREATEST makes the retry harmless).
+        transaction.on_commit(lambda: _forget_generations(consumed, max(last, flushed)))
+    return len(enrollments)
+
+
+def _forget_generations(keys, flushed):
+    cache.delete_many(keys)
+    cache.set(FLUSHED_KEY, flushed, timeout=None)
+
+
+def maybe_flush_progress():
+    # At most one flush per interval across all workers, run by whichever
+    # request gets the lock.
+    if cache.add(FLUSH_LOCK_KEY, 1, flush_interval()):
+        return flush_progress()
+    return 0
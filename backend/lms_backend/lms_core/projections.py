@@ -0,0 +1,245 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, Func, IntegerField, OuterRef, Subquery
+from django.utils import timezone
+
+from .images import image_srcset
+from .models import Course, Enrollment
+from authentication.models import User
+
+
+# Flat `.values()` projections for the report endpoints. Each column is compiled
+# once into (output key, converter) and must render exactly like the matching
+# DRF serializer: EnrollmentSerializer and CourseSerializer without a request.
+
+_SKIP = object()
+
+# Keeps `IN (...)` lists under SQLite's bound-parameter limit.
+COUNT_BATCH_SIZE = 500
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _datetime_converter():
+    tz = timezone.get_current_timezone()
+
+    def convert(value):
+        if value is None:
+            return None
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _decimal_converter(model, field_name):
+    places = Decimal(1).scaleb(-model._meta.get_field(field_name).decimal_places)
+
+    def convert(value):
+        return None if value is None else f'{value.quantize(places):f}'
+    return convert
+
+
+def _file_url_converter(model, field_name):
+    storage = model._meta.get_field(field_name).storage
+
+    def convert(value):
+        return storage.url(value) if value else None
+    return convert
+
+
+def _full_name(first_name, last_name):
+    def convert(row):
+        return f"{row[first_name]} {row[last_name]}"
+    return convert
+
+
+def _skip_if_null(key, convert=None):
+    # DRF omits a dotted-source field (e.g. category.name) when the relation is null.
+    def wrapped(row):
+        if row[key] is None:
+            return _SKIP
+        return convert(row) if convert else row[key]
+    return wrapped
+
+
+class RowProjection:
+    # Subclasses define `columns()` returning (output key, row -> value) pairs.
+
+    def __init__(self):
+        self.compiled = self.columns()
+
+    def convert(self, row):
+        data = {}
+        for key, convert in self.compiled:
+            value = convert(row)
+            if value is not _SKIP:
+                data[key] = value
+        return data
+
+    def convert_rows(self, rows):
+        convert = self.convert
+        return [convert(row) for row in rows]
+
+
+def _col(name, convert=None):
+    if convert is None:
+        return lambda row: row[name]
+    return lambda row: convert(row[name])
+
+
+class UserProjection(RowProjection):
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        super().__init__()
+
+    @property
+    def values(self):
+        p = self.prefix
+        return [
+            f'{p}id', f'{p}email', f'{p}first_name', f'{p}last_name', f'{p}role',
+            f'{p}phone', f'{p}bio', f'{p}profile_image', f'{p}created_at',
+        ]
+
+    def columns(self):
+        p = self.prefix
+        to_datetime = _datetime_converter()
+        return [
+            ('id', _col(f'{p}id', _str)),
+            ('email', _col(f'{p}email')),
+            ('first_name', _col(f'{p}first_name')),
+            ('last_name', _col(f'{p}last_name')),
+            ('full_name', _full_name(f'{p}first_name', f'{p}last_name')),
+            ('role', _col(f'{p}role')),
+            ('phone', _col(f'{p}phone')),
+            ('bio', _col(f'{p}bio')),
+            ('profile_image', _col(f'{p}profile_image', _file_url_converter(User, 'profile_image'))),
+            ('profile_image_srcset', _col(f'{p}profile_image', image_srcset)),
+            ('created_at', _col(f'{p}created_at', to_datetime)),
+        ]
+
+
+class CourseProjection(RowProjection):
+    # Mirrors CourseListSerializer, or CourseSerializer when `detailed`.
+
+    def __init__(self, prefix='', detailed=False, enrollment_counts=None):
+        self.prefix = prefix
+        self.detailed = detailed
+        self.enrollment_counts = enrollment_counts
+        self.instructor = UserProjection(f'{prefix}instructor__')
+        super().__init__()
+
+    @property
+    def values(self):
+        p = self.prefix
+        values = [
+            f'{p}id', f'{p}title', f'{p}description', f'{p}category_id', f'{p}category__name',
+            f'{p}instructor_id', f'{p}instructor__first_name', f'{p}instructor__last_name',
+            f'{p}thumbnail', f'{p}difficulty', f'{p}duration', f'{p}price',
+            f'{p}is_published', f'{p}created_at', f'{p}updated_at',
+        ]
+        if self.detailed:
+            values += [value for value in self.instructor.values if value not in values]
+        return values
+
+    def columns(self):
+        p = self.prefix
+        to_datetime = _datetime_converter()
+        counts = self.enrollment_counts
+        if counts is None:
+            enrollment_count = _col('annotated_enrollment_count')
+        else:
+            enrollment_count = lambda row: counts.get(row[f'{p}id'], 0)
+        
+        columns = [
+            ('id', _col(f'{p}id', _str)),
+            ('title', _col(f'{p}title')),
+            ('description', _col(f'{p}description')),
+            ('category', _col(f'{p}category_id', _str)),
+            ('category_name', _skip_if_null(f'{p}category_id', _col(f'{p}category__name'))),
+            ('instructor', _col(f'{p}instructor_id', _str)),
+            ('instructor_name', _full_name(f'{p}instructor__first_name', f'{p}instructor__last_name')),
+        ]
+        if self.detailed:
+            columns.append(('instructor_details', self.instructor.convert))
+        columns += [
+            ('thumbnail', _col(f'{p}thumbnail', _file_url_converter(Course, 'thumbnail'))),
+            ('thumbnail_srcset', _col(f'{p}thumbnail', image_srcset)),
+            ('difficulty', _col(f'{p}difficulty')),
+            ('duration', _col(f'{p}duration')),
+            ('price', _col(f'{p}price', _decimal_converter(Course, 'price'))),
+            ('is_published', _col(f'{p}is_published')),
+            ('enrollment_count', enrollment_count),
+            ('is_enrolled', lambda row: False),
+            ('created_at', _col(f'{p}created_at', to_datetime)),
+            ('updated_at', _col(f'{p}updated_at', to_datetime)),
+        ]
+        return columns
+
+
+class EnrollmentProjection(RowProjection):
+    # Mirrors EnrollmentSerializer (with the compact nested course).
+
+    def __init__(self):
+        self.enrollment_counts = {}
+        self.course = CourseProjection('course__', enrollment_counts=self.enrollment_counts)
+        super().__init__()
+
+    def convert_rows(self, rows):
+        # Nested course totals are counted for the courses in `rows` only.
+        rows = list(rows)
+        course_ids = list({row['course_id'] for row in rows} - self.enrollment_counts.keys())
+        for start in range(0, len(course_ids), COUNT_BATCH_SIZE):
+            self.enrollment_counts.update(
+                Enrollment.objects.filter(course_id__in=course_ids[start:start + COUNT_BATCH_SIZE])
+                .order_by().values_list('course_id').annotate(total=Count('id'))
+            )
+        return super().convert_rows(rows)
+
+    @property
+    def values(self):
+        return [
+            'id', 'student_id', 'student__first_name', 'student__last_name', 'student__email',
+            'course_id', 'status', 'progress', 'enrolled_at', 'completed_at',
+        ] + self.course.values
+
+    def columns(self):
+        to_datetime = _datetime_converter()
+        return [
+            ('id', _col('id', _str)),
+            ('student', _col('student_id', _str)),
+            ('student_name', _full_name('student__first_name', 'student__last_name')),
+            ('student_email', _col('student__email')),
+            ('course', _col('course_id', _str)),
+            ('course_title', _col('course__title')),
+            ('course_details', self.course.convert),
+            ('status', _col('status')),
+            ('progress', _col('progress')),
+            ('enrolled_at', _col('enrolled_at', to_datetime)),
+            ('completed_at', _col('completed_at', to_datetime)),
+        ]
+
+
+def enrollment_count_subquery(course_ref='pk'):
+    # Correlated COUNT per course row (answered from the course_id index), so
+    # listings keep their ordering indexes instead of grouping every enrollment.
+    counts = Enrollment.objects.filter(course_id=OuterRef(course_ref)).order_by().annotate(
+        total=Func(F('id'), function='COUNT')
+    ).values('total')
+    return Subquery(counts, output_field=IntegerField())
+
+
+def course_report_rows(queryset):
+    projection = CourseProjection(detailed=True)
+    return projection, queryset.annotate(
+        annotated_enrollment_count=enrollment_count_subquery()
+    ).values(*projection.values, 'annotated_enrollment_count')
+
+
+def enrollment_report_rows(queryset):
+    # Course totals are grouped per converted page (EnrollmentProjection.convert_rows).
+    projection = EnrollmentProjection()
+    return projection, queryset.values(*projection.values)
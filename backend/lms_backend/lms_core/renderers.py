@@ -0,0 +1,91 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+class StreamingRowRenderer(BaseRenderer):
+    charset = 'utf-8'
+    rows_per_chunk = 500
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Regular (non-streamed) responses such as permission errors.
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0].keys()) if rows else []
+        return ''.join(self.stream(rows, fields)).encode(self.charset)
+
+    def stream(self, rows, fields):
+        buffer = []
+        header = self.header(fields)
+        if header:
+            buffer.append(header)
+        for row in rows:
+            buffer.append(self.format_row(row, fields))
+            if len(buffer) >= self.rows_per_chunk:
+                yield ''.join(buffer)
+                buffer = []
+        if buffer:
+            yield ''.join(buffer)
+
+    def header(self, fields):
+        return ''
+
+    def format_row(self, row, fields):
+        raise NotImplementedError
+
+
+class CSVRenderer(StreamingRowRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(_Echo())
+
+    def header(self, fields):
+        return self.writer.writerow(fields)
+
+    def format_row(self, row, fields):
+        values = []
+        for field in fields:
+            value = row.get(field)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append('' if value is None else value)
+        return self.writer.writerow(values)
+
+
+class NDJSONRenderer(StreamingRowRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def format_row(self, row, fields):
+        return json.dumps({field: row.get(field) for field in fields}, cls=DjangoJSONEncoder) + '\n'
+
+
+class FastJSONRenderer(JSONRenderer):
+    # Same bytes as JSONRenderer; uses orjson when installed and no indent is requested.
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
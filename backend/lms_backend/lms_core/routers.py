@@ -0,0 +1,128 @@
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+
+class RequestDBState:
+    def __init__(self):
+        self.read_replica = False
+        self.wrote = False
+
+
+_request_state = contextvars.ContextVar('lms_request_db_state', default=None)
+
+
+def replica_alias():
+    alias = getattr(settings, 'LMS_REPLICA_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES else None
+
+
+def start_request():
+    state = RequestDBState()
+    _request_state.set(state)
+    return state
+
+
+def pin_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'lms:replica-pin:user:{user.pk}'
+    return f"lms:replica-pin:ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+# The pin is read by whichever worker serves the next request, so replicas
+# require a shared cache (checks.check_replica_pin_cache).
+def pin_to_primary(request):
+    cache.set(pin_key(request), True, getattr(settings, 'LMS_REPLICA_PIN_SECONDS', 15))
+
+
+def is_pinned(request):
+    return bool(cache.get(pin_key(request)))
+
+
+class ReplicaHealth:
+    # Per-process, periodically refreshed answer to "is the replica usable?",
+    # so the lag query doesn't run on every request.
+
+    def __init__(self):
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def lag(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    # Zero when the standby has replayed everything it received; NULL
+                    # (treated as zero) when the alias isn't a standby at all.
+                    cursor.execute(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                    )
+                    return float(cursor.fetchone()[0] or 0)
+                cursor.execute('SELECT 1')
+                return 0.0
+        except DatabaseError:
+            return None
+
+    def is_usable(self, alias):
+        now = time.monotonic()
+        entry = self._checked.get(alias)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        lag = self.lag(alias)
+        usable = lag is not None and lag <= getattr(settings, 'LMS_REPLICA_MAX_LAG', 5)
+        with self._lock:
+            self._checked[alias] = (now + getattr(settings, 'LMS_REPLICA_CHECK_INTERVAL', 5), usable)
+        return usable
+
+    def clear(self):
+        with self._lock:
+            self._checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    # Reads go to the replica only inside views that opt in (ReplicaReadMixin),
+    # and never after the current request has written.
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or not state.read_replica or state.wrote:
+            return None
+        alias = replica_alias()
+        if alias is None or not replica_health.is_usable(alias):
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    # For read-only API views: safe requests read from the replica unless the
+    # client wrote recently (read-your-writes).
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        state = _request_state.get()
+        if state is None or request.method not in SAFE_METHODS or replica_alias() is None:
+            return
+        if self.replica_allowed(request) and not is_pinned(request):
+            state.read_replica = True
+
+    def replica_allowed(self, request):
+        return True
@@ -0,0 +1,202 @@
+import re
+import uuid
+
+from django.db import connection
+from django.db.models import IntegerField, Q, UUIDField
+from django.db.models.expressions import RawSQL
+
+from .models import Course
+
+
+SEARCH_RESULT_LIMIT = 200
+
+# Shorter prefixes expand to too many index terms to stay fast.
+MIN_PREFIX_LENGTH = 3
+
+# Column weights: title counts most, then category and instructor, then description.
+SQLITE_BM25_WEIGHTS = '0.0, 10.0, 1.0, 4.0, 4.0'
+
+SQLITE_CREATE_SQL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS course_search USING fts5(
+        course_id UNINDEXED, title, description, category_name, instructor_name,
+        tokenize = 'porter unicode61 remove_diacritics 2', prefix = '3'
+    )
+"""
+
+SQLITE_INDEX_SQL = """
+    INSERT INTO course_search (course_id, title, description, category_name, instructor_name)
+    SELECT c.id, c.title, c.description, COALESCE(cat.name, ''), u.first_name || ' ' || u.last_name
+    FROM courses c
+    LEFT JOIN categories cat ON cat.id = c.category_id
+    INNER JOIN users u ON u.id = c.instructor_id
+"""
+
+POSTGRES_CREATE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS course_search (
+        course_id uuid PRIMARY KEY REFERENCES courses (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS course_search_document_gin ON course_search USING GIN (document)',
+]
+
+POSTGRES_INDEX_SQL = """
+    INSERT INTO course_search (course_id, document)
+    SELECT c.id,
+        setweight(to_tsvector('english', c.title), 'A') ||
+        setweight(to_tsvector('english', COALESCE(cat.name, '')), 'B') ||
+        setweight(to_tsvector('english', u.first_name || ' ' || u.last_name), 'B') ||
+        setweight(to_tsvector('english', c.description), 'C')
+    FROM courses c
+    LEFT JOIN categories cat ON cat.id = c.category_id
+    INNER JOIN users u ON u.id = c.instructor_id
+"""
+
+
+def search_backend(conn=connection):
+    if conn.vendor in ('sqlite', 'postgresql'):
+        return conn.vendor
+    return None
+
+
+def create_search_index(conn=connection):
+    backend = search_backend(conn)
+    with conn.cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.execute(SQLITE_CREATE_SQL)
+        elif backend == 'postgresql':
+            for sql in POSTGRES_CREATE_SQL:
+                cursor.execute(sql)
+
+
+def drop_search_index(conn=connection):
+    if search_backend(conn):
+        with conn.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS course_search')
+
+
+def _reindex(where=None, params=(), conn=connection):
+    backend = search_backend(conn)
+    if backend is None:
+        return
+    where_sql = f' WHERE {where}' if where else ''
+    with conn.cursor() as cursor:
+        if backend == 'sqlite':
+            delete_where = f' WHERE course_id IN (SELECT c.id FROM courses c{where_sql})' if where else ''
+            cursor.execute(f'DELETE FROM course_search{delete_where}', params)
+            cursor.execute(SQLITE_INDEX_SQL + where_sql, params)
+        else:
+            cursor.execute(
+                POSTGRES_INDEX_SQL + where_sql +
+                ' ON CONFLICT (course_id) DO UPDATE SET document = EXCLUDED.document',
+                params
+            )
+
+
+def _db_id(pk):
+    return Course._meta.pk.get_db_prep_value(pk, connection)
+
+
+def index_courses(course_ids):
+    course_ids = [_db_id(pk) for pk in course_ids]
+    if course_ids:
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        _reindex(f'c.id IN ({placeholders})', course_ids)
+
+
+def index_category_courses(category):
+    _reindex('c.category_id = %s', [_db_id(category.pk)])
+
+
+def index_instructor_courses(user):
+    _reindex('c.instructor_id = %s', [_db_id(user.pk)])
+
+
+def remove_course(course):
+    if search_backend():
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM course_search WHERE course_id = %s', [_db_id(course.pk)])
+
+
+def rebuild_search_index(conn=connection):
+    backend = search_backend(conn)
+    if backend is None:
+        return
+    with conn.cursor() as cursor:
+        cursor.execute('DELETE FROM course_search')
+    _reindex(conn=conn)
+    if backend == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO course_search (course_search) VALUES ('optimize')")
+
+
+def _search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _candidate_sql(candidates):
+    # Restricts ranking to the rows `candidates` would return, so the limit
+    # applies after visibility and request filters rather than before. The
+    # correlated EXISTS is a primary key probe per match.
+    if candidates is None or not candidates.query.where:
+        return '', []
+    match = RawSQL('course_search.course_id', [], output_field=UUIDField())
+    sql, params = candidates.order_by().filter(pk=match).values('pk').query.sql_with_params()
+    return f' AND EXISTS ({sql})', list(params)
+
+
+def ranked_course_ids(query, limit=SEARCH_RESULT_LIMIT, candidates=None):
+    backend = search_backend()
+    terms = _search_terms(query)
+    if not terms:
+        return []
+    candidate_sql, candidate_params = _candidate_sql(candidates)
+    with connection.cursor() as cursor:
+        prefix = len(terms[-1]) >= MIN_PREFIX_LENGTH
+        if backend == 'sqlite':
+            # Every term must match; the last one may also match as a prefix.
+            match = ' '.join(f'"{term}"' for term in terms) + ('*' if prefix else '')
+            cursor.execute(
+                f'SELECT course_id FROM course_search WHERE course_search MATCH %s{candidate_sql} '
+                f'ORDER BY bm25(course_search, {SQLITE_BM25_WEIGHTS}) LIMIT %s',
+                [match, *candidate_params, limit]
+            )
+        else:
+            tsquery = ' & '.join(terms) + (':*' if prefix else '')
+            cursor.execute(
+                "SELECT course_id FROM course_search, to_tsquery('english', %s) query "
+                f'WHERE document @@ query{candidate_sql} ORDER BY ts_rank_cd(document, query) DESC LIMIT %s',
+                [tsquery, *candidate_params, limit]
+            )
+        return [uuid.UUID(str(row[0])) for row in cursor.fetchall()]
+
+
+def search_courses(queryset, query):
+    if search_backend() is None:
+        q_filter = Q()
+        for term in _search_terms(query):
+            q_filter &= (
+                Q(title__icontains=term) | Q(description__icontains=term) |
+                Q(category__name__icontains=term) |
+                Q(instructor__first_name__icontains=term) | Q(instructor__last_name__icontains=term)
+            )
+        return queryset.filter(q_filter)
+    
+    course_ids = ranked_course_ids(query, SEARCH_RESULT_LIMIT, candidates=queryset)
+    if not course_ids:
+        return queryset.none()
+    # A single positional expression; a CASE/WHEN per id is costly to compile.
+    if search_backend() == 'sqlite':
+        relevance = RawSQL(
+            'instr(%s, "courses"."id")',
+            [','.join(_db_id(pk) for pk in course_ids)],
+            output_field=IntegerField()
+        )
+    else:
+        relevance = RawSQL(
+            'array_position(%s::uuid[], "courses"."id")',
+            [course_ids],
+            output_field=IntegerField()
+        )
+    return queryset.filter(pk__in=course_ids).annotate(search_rank=relevance).order_by('search_rank')
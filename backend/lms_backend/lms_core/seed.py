@@ -0,0 +1,333 @@
+import calendar
+import hashlib
+import itertools
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+from multiprocessing import get_context
+
+from django.db import connection, connections, transaction
+
+from .models import Category, Course, Enrollment
+from authentication.models import User
+
+
+# Synthetic data for load and capacity testing. Every chunk is derived from the
+# seed and its own index, so output does not depend on the number of workers,
+# and foreign keys are computed instead of read back from the database. Rows are
+# built as database-ready tuples and written with one executemany per chunk.
+
+FIRST_NAMES = [
+    'Aisha', 'Ben', 'Carla', 'Dmitri', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jamal',
+    'Kofi', 'Lena', 'Mateo', 'Nadia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sven', 'Tariq',
+    'Uma', 'Victor', 'Wen', 'Ximena', 'Yusuf', 'Zoe', 'Arjun', 'Bea', 'Chen', 'Diego',
+]
+LAST_NAMES = [
+    'Adams', 'Banerjee', 'Costa', 'Dubois', 'Eriksen', 'Fischer', 'Garcia', 'Haddad', 'Ito', 'Jensen',
+    'Kowalski', 'Lopez', 'Mensah', 'Nakamura', 'Okafor', 'Petrov', 'Qureshi', 'Rossi', 'Silva', 'Tanaka',
+    'Ueda', 'Varga', 'Williams', 'Xu', 'Yilmaz', 'Zhang', 'Murphy', 'Novak', 'Olsen', 'Park',
+]
+CATEGORY_NAMES = [
+    'Programming', 'Data Science', 'Web Development', 'Design', 'Business', 'Marketing',
+    'Photography', 'Music', 'Languages', 'Mathematics', 'Personal Development', 'Finance',
+    'Health & Fitness', 'IT & Networking', 'Cloud Computing', 'Security',
+]
+TOPICS = [
+    'Python', 'JavaScript', 'React', 'Django', 'SQL', 'Machine Learning', 'Statistics', 'UX Research',
+    'Figma', 'Accounting', 'Copywriting', 'SEO', 'Portrait Lighting', 'Music Theory', 'Spanish',
+    'Linear Algebra', 'Public Speaking', 'Investing', 'Yoga', 'Kubernetes', 'AWS', 'Network Security',
+    'Rust', 'Go', 'Data Visualization', 'Product Management', 'Excel', 'Calculus', 'Japanese', 'Docker',
+]
+TITLE_FORMATS = [
+    'Introduction to {}', '{} for Beginners', 'Practical {}', 'Mastering {}', '{} in Depth',
+    'Hands-on {}', '{} Bootcamp', 'Foundations of {}', 'Advanced {}', '{} Crash Course',
+]
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+DIFFICULTY_WEIGHTS = [5, 3, 2]
+PRICES = ['0.00', '9.99', '19.99', '29.99', '49.99', '99.99', '199.99']
+PRICE_WEIGHTS = [3, 2, 4, 3, 3, 2, 1]
+STATUSES = ['active', 'completed', 'dropped']
+STATUS_WEIGHTS = [65, 25, 10]
+
+SQLITE_CACHE_KIB = 256 * 1024
+
+
+def make_plan(seed, users, instructors, categories, courses, enrollments, days, end, password_hash,
+              chunk_size=10000, zipf_exponent=1.1, email_domain='seed.lms.test'):
+    # A plain dict so it pickles cheaply into worker processes.
+    return {
+        'seed': seed, 'users': users, 'instructors': instructors, 'categories': categories,
+        'courses': courses, 'enrollments': enrollments, 'days': days,
+        'end': calendar.timegm(end.utctimetuple()), 'password_hash': password_hash,
+        'chunk_size': chunk_size, 'zipf_exponent': zipf_exponent, 'email_domain': email_domain,
+        # Datetimes are passed as text: naive UTC on SQLite, offset-qualified elsewhere.
+        'utc_suffix': '' if connection.vendor == 'sqlite' else '+00:00',
+    }
+
+
+@lru_cache(maxsize=16)
+def _id_prefix(seed, kind):
+    # Ids are a per-kind prefix plus the row index: valid version 4 UUIDs that
+    # arrive in index order, so primary key inserts append instead of splitting pages.
+    prefix = int.from_bytes(hashlib.md5(f'{seed}:{kind}'.encode()).digest()[:8], 'big')
+    return '%016x' % (prefix & 0xffffffffffff0fff | 0x4000)
+
+
+def row_id(seed, kind, index):
+    return '%s%016x' % (_id_prefix(seed, kind), 0x8000000000000000 | index)
+
+
+@lru_cache(maxsize=2)
+def _course_ids(seed, courses):
+    return [row_id(seed, 'course', index) for index in range(courses)]
+
+
+def _fraction(seed, kind, index):
+    return int.from_bytes(hashlib.md5(f'{seed}:{kind}:{index}'.encode()).digest()[:7], 'big') / (1 << 56)
+
+
+def _rng(plan, table, chunk):
+    return random.Random(f"{plan['seed']}:{table}:{chunk}")
+
+
+def created_at(plan, kind, index):
+    # Seconds since the epoch; the square root skews rows towards the end of the window.
+    return plan['end'] - (1 - math.sqrt(_fraction(plan['seed'], kind, index))) * plan['days'] * 86400
+
+
+@lru_cache(maxsize=None)
+def _hour_prefix(hour):
+    return time.strftime('%Y-%m-%d %H', time.gmtime(hour * 3600))
+
+
+def timestamp(plan, seconds):
+    # Formats seconds since the epoch as text; the date and hour are cached.
+    hour, micros = divmod(int(seconds * 1000000), 3600000000)
+    minute, micros = divmod(micros, 60000000)
+    second, micros = divmod(micros, 1000000)
+    return '%s:%02d:%02d.%06d%s' % (_hour_prefix(hour), minute, second, micros, plan['utc_suffix'])
+
+
+@lru_cache(maxsize=8)
+def zipf_sampler(seed, kind, size, exponent):
+    # Item indices in popularity order plus cumulative Zipf weights for random.choices.
+    order = list(range(size))
+    random.Random(f'{seed}:{kind}:popularity').shuffle(order)
+    weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, size + 1)))
+    return order, weights
+
+
+def _zipf_choices(plan, rng, kind, size, count):
+    order, weights = zipf_sampler(plan['seed'], kind, size, plan['zipf_exponent'])
+    return [order[rank] for rank in rng.choices(range(size), cum_weights=weights, k=count)]
+
+
+def _course_instructors(plan, chunk):
+    # The first draw from the chunk's generator, so enrollments can replay it.
+    rng = _rng(plan, 'courses', chunk)
+    return rng, _zipf_choices(plan, rng, 'instructor', plan['instructors'], len(_chunk_range(plan, 'courses', chunk)))
+
+
+@lru_cache(maxsize=2)
+def _course_created(frozen_plan):
+    # A course is never older than its instructor's account.
+    plan = dict(frozen_plan)
+    created = []
+    for chunk in range(chunk_count(plan, 'courses')):
+        rng, instructors = _course_instructors(plan, chunk)
+        for index, instructor in zip(_chunk_range(plan, 'courses', chunk), instructors):
+            created.append(max(created_at(plan, 'course', index), created_at(plan, 'user', instructor)))
+    return created
+
+
+def course_created(plan):
+    return _course_created(tuple(sorted(plan.items())))
+
+
+def chunk_count(plan, table):
+    return math.ceil(plan[table] / plan['chunk_size'])
+
+
+def _chunk_range(plan, table, chunk):
+    return range(chunk * plan['chunk_size'], min((chunk + 1) * plan['chunk_size'], plan[table]))
+
+
+def build_users(plan, chunk):
+    rng = _rng(plan, 'users', chunk)
+    rows = []
+    for index in _chunk_range(plan, 'users', chunk):
+        created = timestamp(plan, created_at(plan, 'user', index))
+        rows.append((
+            row_id(plan['seed'], 'user', index), f"user{index}@{plan['email_domain']}",
+            rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+            'instructor' if index < plan['instructors'] else 'student',
+            plan['password_hash'], False, True, False, created, created,
+        ))
+    return rows
+
+
+def build_categories(plan, chunk):
+    created = timestamp(plan, plan['end'] - plan['days'] * 86400)
+    rows = []
+    for index in _chunk_range(plan, 'categories', chunk):
+        base = CATEGORY_NAMES[index % len(CATEGORY_NAMES)]
+        name = base if index < len(CATEGORY_NAMES) else f'{base} {index // len(CATEGORY_NAMES) + 1}'
+        rows.append((row_id(plan['seed'], 'category', index), name, f'Courses about {base.lower()}', created, created))
+    return rows
+
+
+def build_courses(plan, chunk):
+    rng, instructors = _course_instructors(plan, chunk)
+    indices = _chunk_range(plan, 'courses', chunk)
+    categories = _zipf_choices(plan, rng, 'category', plan['categories'], len(indices))
+    created_times = course_created(plan)
+    rows = []
+    for index, instructor, category in zip(indices, instructors, categories):
+        topic = rng.choice(TOPICS)
+        created = timestamp(plan, created_times[index])
+        rows.append((
+            row_id(plan['seed'], 'course', index), rng.choice(TITLE_FORMATS).format(topic),
+            f'Learn {topic} step by step with exercises and projects. Course #{index}.',
+            row_id(plan['seed'], 'category', category), row_id(plan['seed'], 'user', instructor),
+            rng.choices(DIFFICULTIES, DIFFICULTY_WEIGHTS)[0], rng.randint(1, 60),
+            Decimal(rng.choices(PRICES, PRICE_WEIGHTS)[0]), rng.random() < 0.85, created, created,
+        ))
+    return rows
+
+
+def build_enrollments(plan, chunk):
+    # Each chunk owns a slice of the students and an equal share of the
+    # enrollments; students get exponentially skewed activity, courses Zipfian
+    # popularity, and repeated (student, course) pairs are redrawn.
+    rng = _rng(plan, 'enrollments', chunk)
+    chunks = chunk_count(plan, 'enrollments')
+    students = plan['users'] - plan['instructors']
+    first = plan['instructors'] + students * chunk // chunks
+    last = plan['instructors'] + students * (chunk + 1) // chunks
+    indices = _chunk_range(plan, 'enrollments', chunk)
+    activity = list(itertools.accumulate(rng.expovariate(1) for _ in range(last - first)))
+
+    pairs = set()
+    while len(pairs) < len(indices):
+        needed = len(indices) - len(pairs)
+        pairs.update(zip(
+            rng.choices(range(first, last), cum_weights=activity, k=needed),
+            _zipf_choices(plan, rng, 'course', plan['courses'], needed),
+        ))
+
+    student_columns = {
+        student: (row_id(plan['seed'], 'user', student), created_at(plan, 'user', student))
+        for student in range(first, last)
+    }
+    course_ids = _course_ids(plan['seed'], plan['courses'])
+    created_times = course_created(plan)
+    statuses = rng.choices(STATUSES, STATUS_WEIGHTS, k=len(indices))
+    seed, end, draw = plan['seed'], plan['end'], rng.random
+    rows = []
+    for index, (student, course), status in zip(indices, sorted(pairs), statuses):
+        student_id, student_created = student_columns[student]
+        enrolled = max(student_created, created_times[course])
+        enrolled += (end - enrolled) * draw()
+        completed_at = dropped_at = None
+        if status == 'active':
+            progress = int(draw() * 96)
+        else:
+            finished = timestamp(plan, enrolled + (end - enrolled) * draw())
+            if status == 'completed':
+                progress, completed_at = 100, finished
+            else:
+                progress, dropped_at = int(draw() * 96), finished
+        rows.append((
+            row_id(seed, 'enrollment', index), student_id, course_ids[course],
+            status, progress, timestamp(plan, enrolled), completed_at, dropped_at,
+        ))
+    return rows
+
+
+BUILDERS = {
+    'users': (User, build_users, [
+        'id', 'email', 'first_name', 'last_name', 'role', 'password',
+        'is_superuser', 'is_active', 'is_staff', 'created_at', 'updated_at',
+    ]),
+    'categories': (Category, build_categories, ['id', 'name', 'description', 'created_at', 'updated_at']),
+    'courses': (Course, build_courses, [
+        'id', 'title', 'description', 'category', 'instructor', 'difficulty', 'duration',
+        'price', 'is_published', 'created_at', 'updated_at',
+    ]),
+    'enrollments': (Enrollment, build_enrollments, [
+        'id', 'student', 'course', 'status', 'progress', 'enrolled_at', 'completed_at', 'dropped_at',
+    ]),
+}
+
+
+def insert_sql(model, field_names):
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(name).column) for name in field_names)
+    placeholders = ', '.join(['%s'] * len(field_names))
+    return f'INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+
+def insert_chunk(plan, table, chunk):
+    model, build, field_names = BUILDERS[table]
+    rows = build(plan, chunk)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_KIB}')
+        cursor.executemany(insert_sql(model, field_names), rows)
+    return len(rows)
+
+
+def seeded_tables():
+    return [model._meta.db_table for model, build, field_names in BUILDERS.values()]
+
+
+def _secondary_indexes(cursor, tables):
+    # (name, CREATE statement) for indexes not backing a primary key or constraint.
+    if connection.vendor == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(tables))
+        cursor.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND tbl_name IN ({placeholders})", tables
+        )
+    elif connection.vendor == 'postgresql':
+        cursor.execute(
+            'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = ANY(%s) '
+            'AND indexname NOT IN (SELECT conname FROM pg_constraint)', [tables]
+        )
+    else:
+        return []
+    return cursor.fetchall()
+
+
+@contextmanager
+def deferred_indexes(tables):
+    # Drops the secondary indexes of the (empty) tables for the load and
+    # recreates them in one sorted pass each afterwards.
+    with connection.cursor() as cursor:
+        indexes = _secondary_indexes(cursor, tables) if tables else []
+        for name, sql in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield indexes
+    finally:
+        with connection.cursor() as cursor:
+            for name, sql in indexes:
+                cursor.execute(sql)
+
+
+def seed_table(plan, table, workers=1):
+    # Yields the row count of each chunk as it is written. With workers > 1,
+    # chunks are built and inserted by forked processes with their own
+    # connections; on SQLite the inserts still serialize on the write lock.
+    chunks = range(chunk_count(plan, table))
+    if workers <= 1:
+        for chunk in chunks:
+            yield insert_chunk(plan, table, chunk)
+        return
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork')) as executor:
+        yield from executor.map(insert_chunk, itertools.repeat(plan), itertools.repeat(table), chunks)
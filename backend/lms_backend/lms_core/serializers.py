@@ -1,24 +1,94 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
 from .models import Category, Course, Enrollment
+from .exceptions import Conflict
+from .images import image_srcset
+from .analytics import MAX_PERIOD_COUNTS, default_start, period_count
 from authentication.serializers import UserSerializer
 
+
+def get_enrolled_course_ids(context):
+    # Resolved once per serializer tree; nested serializers share the root context.
+    if 'enrolled_course_ids' not in context:
+        request = context.get('request')
+        if request and request.user.is_authenticated:
+            course_ids = Enrollment.objects.filter(student=request.user).values_list('course_id', flat=True)
+            context['enrolled_course_ids'] = frozenset(course_ids)
+        else:
+            context['enrolled_course_ids'] = frozenset()
+    return context['enrolled_course_ids']
+
+
+async def aget_enrolled_course_ids(context):
+    if 'enrolled_course_ids' not in context:
+        request = context.get('request')
+        if request and request.user.is_authenticated:
+            course_ids = Enrollment.objects.filter(student=request.user).values_list('course_id', flat=True)
+            context['enrolled_course_ids'] = frozenset([course_id async for course_id in course_ids])
+        else:
+            context['enrolled_course_ids'] = frozenset()
+    return context['enrolled_course_ids']
+
+
+def _query_param_set(request, name):
+    value = request.query_params.get(name, '')
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+class DynamicFieldsMixin:
+    # On GET requests the top-level serializer honours ?fields=a,b (keep only
+    # those, plus id) and ?expand=x (add fields from Meta.expandable_fields).
+    
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method != 'GET' or not self._is_top_level():
+            return fields
+        
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in _query_param_set(request, 'expand'):
+            if name in expandable and name not in fields:
+                fields[name] = expandable[name]()
+        
+        only = _query_param_set(request, 'fields')
+        if only:
+            only.add('id')
+            for name in list(fields):
+                if name not in only:
+                    fields.pop(name)
+        return fields
+
+
 class CategorySerializer(serializers.ModelSerializer):
     course_count = serializers.SerializerMethodField()
+    total_course_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'course_count', 'created_at']
+        fields = ['id', 'name', 'description', 'course_count', 'total_course_count', 'created_at']
         read_only_fields = ['id', 'created_at']
     
     def get_course_count(self, obj):
+        if hasattr(obj, 'annotated_course_count'):
+            return obj.annotated_course_count
+        return obj.courses.filter(is_published=True).count()
+    
+    def get_total_course_count(self, obj):
+        if hasattr(obj, 'annotated_total_course_count'):
+            return obj.annotated_total_course_count
         return obj.courses.count()
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     instructor_name = serializers.CharField(source='instructor.get_full_name', read_only=True)
-    instructor_details = UserSerializer(source='instructor', read_only=True)
-    category_name = serializers.CharField(source='category.name', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
+    thumbnail_srcset = serializers.SerializerMethodField()
     enrollment_count = serializers.SerializerMethodField()
     is_enrolled = serializers.SerializerMethodField()
     
@@ -26,20 +96,25 @@ class CourseSerializer(serializers.ModelSerializer):
         model = Course
         fields = [
             'id', 'title', 'description', 'category', 'category_name',
-            'instructor', 'instructor_name', 'instructor_details',
-            'thumbnail', 'difficulty', 'duration', 'price',
+            'instructor', 'instructor_name',
+            'thumbnail', 'thumbnail_srcset', 'difficulty', 'duration', 'price',
             'is_published', 'enrollment_count', 'is_enrolled', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {
+            'instructor_details': lambda: UserSerializer(source='instructor', read_only=True),
+        }
     
     def get_enrollment_count(self, obj):
-        return getattr(obj, 'annotated_enrollment_count', obj.enrollments.count())
+        if hasattr(obj, 'annotated_enrollment_count'):
+            return obj.annotated_enrollment_count
+        return obj.enrollments.count()
 
     def get_is_enrolled(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Enrollment.objects.filter(student=request.user, course=obj).exists()
-        return False
+        return obj.pk in get_enrolled_course_ids(self.context)
+    
+    def get_thumbnail_srcset(self, obj):
+        return image_srcset(obj.thumbnail.name, self.context.get('request'))
     
     def validate(self, data):
         request = self.context.get('request')
@@ -49,6 +124,19 @@ class CourseSerializer(serializers.ModelSerializer):
         return data
 
 
+class CourseSerializer(CourseListSerializer):
+    instructor_details = UserSerializer(source='instructor', read_only=True)
+    
+    class Meta(CourseListSerializer.Meta):
+        fields = [
+            'id', 'title', 'description', 'category', 'category_name',
+            'instructor', 'instructor_name', 'instructor_details',
+            'thumbnail', 'thumbnail_srcset', 'difficulty', 'duration', 'price',
+            'is_published', 'enrollment_count', 'is_enrolled', 'created_at', 'updated_at'
+        ]
+        expandable_fields = {}
+
+
 class CourseCreateUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
@@ -58,11 +146,11 @@ class CourseCreateUpdateSerializer(serializers.ModelSerializer):
         ]
 
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.get_full_name', read_only=True)
     student_email = serializers.CharField(source='student.email', read_only=True)
     course_title = serializers.CharField(source='course.title', read_only=True)
-    course_details = CourseSerializer(source='course', read_only=True)
+    course_details = CourseListSerializer(source='course', read_only=True)
     
     class Meta:
         model = Enrollment
@@ -73,16 +161,64 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'student', 'enrolled_at']
     
-    def validate(self, data):
-        request = self.context.get('request')
-        if request and request.method == 'POST':
-            student = data.get('student', request.user)
-            course = data.get('course')
-            
-            if Enrollment.objects.filter(student=student, course=course).exists():
-                raise serializers.ValidationError("Already enrolled in this course")
-        
-        return data
+    def to_representation(self, instance):
+        if hasattr(instance, 'course_enrollment_count'):
+            instance.course.annotated_enrollment_count = instance.course_enrollment_count
+        return super().to_representation(instance)
+    
+    def create(self, validated_data):
+        # The unique (student, course) constraint is the duplicate check, so
+        # concurrent requests can't both insert and no extra query is needed.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if Enrollment.objects.filter(
+                student=validated_data.get('student'), course=validated_data.get('course')
+            ).exists():
+                raise Conflict("Already enrolled in this course")
+            raise
+
+
+class EnrollmentDetailSerializer(EnrollmentSerializer):
+    course_details = CourseSerializer(source='course', read_only=True)
+
+
+class BulkEnrollmentItemSerializer(serializers.Serializer):
+    student = serializers.UUIDField()
+    course = serializers.UUIDField()
+
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    enrollments = BulkEnrollmentItemSerializer(many=True, allow_empty=False)
+    
+    def validate_enrollments(self, value):
+        max_rows = getattr(settings, 'LMS_BULK_ENROLLMENT_MAX_ROWS', 10000)
+        if len(value) > max_rows:
+            raise serializers.ValidationError(f"At most {max_rows} enrollments per request")
+        return value
+
+
+class EnrollmentProgressSerializer(serializers.Serializer):
+    progress = serializers.IntegerField(min_value=0, max_value=100)
+
+
+class EnrollmentAnalyticsQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=['day', 'week', 'month'], default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    course = serializers.UUIDField(required=False)
+    
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': 'Must not be after end'})
+        period = attrs['period']
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', default_start(attrs['end'], period))
+        max_count = MAX_PERIOD_COUNTS[period]
+        if period_count(attrs['start'], attrs['end'], period) > max_count:
+            raise serializers.ValidationError({'start': f'At most {max_count} {period}s per request'})
+        return attrs
 
 
 class DashboardStatsSerializer(serializers.Serializer):
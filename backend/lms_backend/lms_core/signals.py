@@ -0,0 +1,179 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.utils import timezone
+
+from .models import Category, Course, Enrollment
+from .counters import counters_enabled, counter_names, apply_counter_deltas
+from .cache import bump_cache_version
+from . import search
+from .images import variant_pool
+from .progress import forget_enrollment_owner
+from .analytics import rollup_state, rollup_keys, apply_rollup_deltas
+from authentication.models import User
+
+
+COUNTED_MODELS = (User, Course, Enrollment)
+
+
+def remember_counter_names(sender, instance, **kwargs):
+    if not counters_enabled():
+        return
+    instance._dashboard_counter_names = counter_names(instance)
+
+
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or not counters_enabled():
+        return
+    deltas = Counter(counter_names(instance))
+    if not created:
+        deltas.subtract(getattr(instance, '_dashboard_counter_names', deltas.keys()))
+    apply_counter_deltas(deltas)
+    remember_counter_names(sender, instance)
+
+
+def update_counters_on_delete(sender, instance, **kwargs):
+    if not counters_enabled():
+        return
+    deltas = Counter(getattr(instance, '_dashboard_counter_names', counter_names(instance)))
+    apply_counter_deltas({name: -delta for name, delta in deltas.items()})
+
+
+for model in COUNTED_MODELS:
+    post_init.connect(remember_counter_names, sender=model, dispatch_uid=f'dashboard_counters_init_{model.__name__}')
+    post_save.connect(update_counters_on_save, sender=model, dispatch_uid=f'dashboard_counters_save_{model.__name__}')
+    post_delete.connect(update_counters_on_delete, sender=model, dispatch_uid=f'dashboard_counters_delete_{model.__name__}')
+
+
+def invalidate_category_cache(sender, instance, **kwargs):
+    bump_cache_version('categories')
+
+
+for model in (Category, Course):
+    post_save.connect(invalidate_category_cache, sender=model, dispatch_uid=f'category_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_category_cache, sender=model, dispatch_uid=f'category_cache_delete_{model.__name__}')
+
+
+def invalidate_course_cache(sender, instance, **kwargs):
+    bump_cache_version('courses')
+
+
+for model in (Category, Course, Enrollment):
+    post_save.connect(invalidate_course_cache, sender=model, dispatch_uid=f'course_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_course_cache, sender=model, dispatch_uid=f'course_cache_delete_{model.__name__}')
+
+
+def index_saved_course(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_courses([instance.pk])
+
+
+def unindex_deleted_course(sender, instance, **kwargs):
+    search.remove_course(instance)
+
+
+def index_category_courses(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        search.index_category_courses(instance)
+
+
+def remember_category_courses(sender, instance, **kwargs):
+    instance._search_course_ids = list(instance.courses.values_list('pk', flat=True))
+
+
+def index_orphaned_courses(sender, instance, **kwargs):
+    search.index_courses(getattr(instance, '_search_course_ids', []))
+
+
+INSTRUCTOR_NAME_FIELDS = ('first_name', 'last_name')
+
+
+def instructor_name(instance):
+    # Read from __dict__ so deferred fields aren't fetched on every User load.
+    return tuple(instance.__dict__.get(field) for field in INSTRUCTOR_NAME_FIELDS)
+
+
+def remember_instructor_name(sender, instance, **kwargs):
+    instance._search_instructor_name = instructor_name(instance)
+
+
+def index_instructor_courses(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Only a name change alters the indexed documents; logins save last_login.
+    if raw or created or instance.role != 'instructor':
+        return
+    if update_fields is not None and not set(update_fields) & set(INSTRUCTOR_NAME_FIELDS):
+        return
+    name = instructor_name(instance)
+    if name != getattr(instance, '_search_instructor_name', None):
+        search.index_instructor_courses(instance)
+        instance._search_instructor_name = name
+
+
+post_save.connect(index_saved_course, sender=Course, dispatch_uid='course_search_save')
+post_delete.connect(unindex_deleted_course, sender=Course, dispatch_uid='course_search_delete')
+post_save.connect(index_category_courses, sender=Category, dispatch_uid='course_search_category_save')
+pre_delete.connect(remember_category_courses, sender=Category, dispatch_uid='course_search_category_pre_delete')
+post_delete.connect(index_orphaned_courses, sender=Category, dispatch_uid='course_search_category_delete')
+post_init.connect(remember_instructor_name, sender=User, dispatch_uid='course_search_instructor_init')
+post_save.connect(index_instructor_courses, sender=User, dispatch_uid='course_search_instructor_save')
+
+
+def forget_progress_owner(sender, instance, **kwargs):
+    forget_enrollment_owner(instance.pk)
+
+
+post_save.connect(forget_progress_owner, sender=Enrollment, dispatch_uid='progress_owner_save')
+post_delete.connect(forget_progress_owner, sender=Enrollment, dispatch_uid='progress_owner_delete')
+
+
+def stamp_enrollment_status(sender, instance, raw=False, **kwargs):
+    # Rollups date completions and drops by these timestamps.
+    if raw:
+        return
+    if instance.status == 'completed' and instance.completed_at is None:
+        instance.completed_at = timezone.now()
+    elif instance.status == 'dropped' and instance.dropped_at is None:
+        instance.dropped_at = timezone.now()
+
+
+def remember_rollup_state(sender, instance, **kwargs):
+    instance._rollup_state = rollup_state(instance)
+
+
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    state = rollup_state(instance)
+    deltas = Counter(rollup_keys(state))
+    if not created:
+        deltas.subtract(rollup_keys(getattr(instance, '_rollup_state', state)))
+    apply_rollup_deltas(deltas)
+    instance._rollup_state = state
+
+
+def update_rollups_on_delete(sender, instance, **kwargs):
+    deltas = Counter(rollup_keys(getattr(instance, '_rollup_state', rollup_state(instance))))
+    apply_rollup_deltas({key: -delta for key, delta in deltas.items()})
+
+
+pre_save.connect(stamp_enrollment_status, sender=Enrollment, dispatch_uid='enrollment_status_stamp')
+post_init.connect(remember_rollup_state, sender=Enrollment, dispatch_uid='enrollment_rollups_init')
+post_save.connect(update_rollups_on_save, sender=Enrollment, dispatch_uid='enrollment_rollups_save')
+post_delete.connect(update_rollups_on_delete, sender=Enrollment, dispatch_uid='enrollment_rollups_delete')
+
+
+IMAGE_FIELDS = {Course: 'thumbnail', User: 'profile_image'}
+
+
+def queue_image_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    field_name = IMAGE_FIELDS[sender]
+    if raw or (update_fields is not None and field_name not in update_fields):
+        return
+    name = getattr(instance, field_name).name
+    if name:
+        transaction.on_commit(lambda: variant_pool.submit(name))
+
+
+for model in IMAGE_FIELDS:
+    post_save.connect(queue_image_variants, sender=model, dispatch_uid=f'image_variants_{model.__name__}')
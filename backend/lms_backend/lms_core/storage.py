@@ -0,0 +1,35 @@
+import hashlib
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+
+VARIANTS_DIR = 'variants/'
+
+
+class ContentHashedStorageMixin:
+    # Uploads are stored as <upload dir>/<xx>/<sha256><ext>, so identical files
+    # share one copy. Derived files under VARIANTS_DIR keep the name they are given.
+
+    def save(self, name, content, max_length=None):
+        if name.startswith(VARIANTS_DIR):
+            return super().save(name, content, max_length)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        ext = posixpath.splitext(name)[1].lower()
+        return posixpath.join(posixpath.dirname(name), digest[:2], f'{digest}{ext}')
+
+
+class ContentHashedFileSystemStorage(ContentHashedStorageMixin, FileSystemStorage):
+    pass
@@ -0,0 +1,277 @@
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from unittest import skipUnless
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from authentication.models import User
+
+from .counters import aggregate_dashboard_stats, read_dashboard_counters, reconcile_dashboard_counters
+from .images import generate_variants, variant_formats, variant_name, variant_widths
+from .models import Category, Course, Enrollment
+from .pagination import CourseReportPagination, EnrollmentReportPagination
+from .serializers import CourseSerializer, EnrollmentSerializer
+from .tests import make_courses, make_students, make_user, serializer_response_bytes, use_temp_media
+
+
+# Opt-in timings: LMS_BENCHMARKS=1 python manage.py test lms_core.test_benchmarks
+# Each benchmark prints its numbers and asserts only coarse relationships.
+BENCHMARKS = os.environ.get('LMS_BENCHMARKS') == '1'
+
+
+def timed(func, repeat=5):
+    # Median wall time in milliseconds.
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def report(title, rows):
+    print(f'\n{title}')
+    for label, value in rows:
+        print(f'  {label:40s} {value}')
+
+
+def photo_bytes(size):
+    # Fine detail at every scale plus sensor-like noise, so neither the
+    # source nor the downsized variants compress unrealistically well.
+    detail = [Image.effect_mandelbrot(size, box, 256) for box in [(-2, -1.2, 1, 1.2), (-0.8, 0, -0.6, 0.2), (-1.5, -0.5, -1, 0)]]
+    noise = Image.effect_noise(size, 24).convert('RGB')
+    buffer = BytesIO()
+    Image.blend(Image.merge('RGB', detail), noise, 0.25).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+@skipUnless(BENCHMARKS, 'set LMS_BENCHMARKS=1')
+class ImageVariantBenchmark(TestCase):
+    def setUp(self):
+        use_temp_media(self)
+
+    def test_12mp_upload(self):
+        data = photo_bytes((4000, 3000))
+        source = default_storage.save('course_thumbnails/photo.jpg', ContentFile(data))
+        started = time.perf_counter()
+        generate_variants(source)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        rows = [('source (4000x3000 JPEG)', f'{len(data):,} bytes'), ('render all variants', f'{elapsed:.0f} ms')]
+        for width in variant_widths():
+            for fmt in variant_formats():
+                size = default_storage.size(variant_name(source, width, fmt))
+                rows.append((f'{width}w.{fmt}', f'{size:,} bytes ({size / len(data):.1%})'))
+        report('12 MP upload', rows)
+        self.assertLess(default_storage.size(variant_name(source, min(variant_widths()), 'webp')), len(data) / 20)
+
+
+@skipUnless(BENCHMARKS, 'set LMS_BENCHMARKS=1')
+class ReportSerializationBenchmark(TestCase):
+    # Report pages through the projections vs. the serializers they replaced.
+    PAGE_SIZE = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        instructor = make_user('instructor@example.com', role='instructor')
+        courses = make_courses(instructor, 2000, category=Category.objects.create(name='Design'))
+        students = make_students(50)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course)
+            for i, course in enumerate(courses[:400]) for student in students[:i % 50]
+        ])
+        cls.admin = make_user('admin@example.com', role='admin')
+
+    def compare(self, name, url, queryset, serializer_class, pagination_class):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        projection_ms = timed(lambda: client.get(url))
+        serializer_ms = timed(lambda: serializer_response_bytes(url, queryset, serializer_class, pagination_class))
+        report(f'{name} ({self.PAGE_SIZE} rows per page)', [
+            ('serializer + JSONRenderer', f'{serializer_ms:7.1f} ms  {self.PAGE_SIZE / serializer_ms * 1000:9,.0f} rows/s'),
+            ('projection + FastJSONRenderer', f'{projection_ms:7.1f} ms  {self.PAGE_SIZE / projection_ms * 1000:9,.0f} rows/s'),
+        ])
+        self.assertLess(projection_ms, serializer_ms)
+
+    def test_course_report(self):
+        self.compare(
+            'Course report', f'/api/lms/reports/courses/?page_size={self.PAGE_SIZE}',
+            Course.objects.select_related('instructor', 'category').annotate(
+                annotated_enrollment_count=Count('enrollments')
+            ).order_by('-created_at'),
+            CourseSerializer, CourseReportPagination,
+        )
+
+    def test_enrollment_report(self):
+        self.compare(
+            'Enrollment report', f'/api/lms/reports/enrollments/?page_size={self.PAGE_SIZE}',
+            Enrollment.objects.select_related('student', 'course', 'course__instructor').order_by('-enrolled_at'),
+            EnrollmentSerializer, EnrollmentReportPagination,
+        )
+
+
+def naive_dashboard_stats():
+    # The seven COUNT queries DashboardStatsView issued before the aggregates.
+    return {
+        'total_users': User.objects.count(),
+        'total_students': User.objects.filter(role='student').count(),
+        'total_instructors': User.objects.filter(role='instructor').count(),
+        'total_courses': Course.objects.count(),
+        'total_enrollments': Enrollment.objects.count(),
+        'published_courses': Course.objects.filter(is_published=True).count(),
+        'active_enrollments': Enrollment.objects.filter(status='active').count(),
+    }
+
+
+@skipUnless(BENCHMARKS, 'set LMS_BENCHMARKS=1')
+class DashboardStatsBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = make_user('instructor@example.com', role='instructor')
+        courses = make_courses(instructor, 500)
+        students = make_students(2000)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=courses[(i * 7 + j) % len(courses)], status='active' if j % 3 else 'completed')
+            for i, student in enumerate(students) for j in range(25)
+        ])
+        reconcile_dashboard_counters()
+
+    def test_dashboard_stats(self):
+        expected = naive_dashboard_stats()
+        self.assertEqual(aggregate_dashboard_stats(), expected)
+        self.assertEqual(read_dashboard_counters(), expected)
+        rows = []
+        for label, func in [
+            ('7 COUNT queries', naive_dashboard_stats),
+            ('3 conditional aggregates', aggregate_dashboard_stats),
+            ('counters table (1 query)', read_dashboard_counters),
+        ]:
+            rows.append((label, f'{timed(func, repeat=21):7.2f} ms'))
+        report(f"Dashboard stats ({expected['total_enrollments']:,} enrollments)", rows)
+        self.assertLess(timed(read_dashboard_counters, repeat=21), timed(naive_dashboard_stats, repeat=21))
+
+
+@skipUnless(BENCHMARKS, 'set LMS_BENCHMARKS=1')
+class InstrumentationOverheadBenchmark(TestCase):
+    URL = '/api/lms/courses/?page_size=20'
+    REQUESTS = 200
+
+    def client_with(self, **overrides):
+        # The middleware chain (and the enabled check) is built on the first request.
+        with override_settings(**overrides):
+            client = APIClient()
+            client.get(self.URL)
+        return client
+
+    def per_request_us(self, clients, rounds=9):
+        # Rounds alternate between clients so drift affects each the same way.
+        samples = {name: [] for name in clients}
+        for _ in range(rounds):
+            for name, client in clients.items():
+                samples[name].append(timed(lambda: [client.get(self.URL) for _ in range(self.REQUESTS)], repeat=1))
+        return {name: statistics.median(values) * 1000 / self.REQUESTS for name, values in samples.items()}
+
+    def test_disabled_overhead(self):
+        make_courses(make_user('instructor@example.com', role='instructor'), 50)
+        without = [name for name in settings.MIDDLEWARE if name != 'lms_core.middleware.PerformanceMiddleware']
+        times = self.per_request_us({
+            'absent': self.client_with(MIDDLEWARE=without),
+            'disabled': self.client_with(LMS_PERF_INSTRUMENTATION=False),
+        })
+        # Enabling patches serializer .data for the rest of the process, so it runs last.
+        times.update(self.per_request_us({'enabled': self.client_with(LMS_PERF_INSTRUMENTATION=True, LMS_PERF_SAMPLE_RATE=0.0)}))
+        absent = times['absent']
+        report('Course list (cached page), per request', [
+            ('middleware not installed', f"{absent:7.0f} us"),
+            ('installed, LMS_PERF_INSTRUMENTATION off', f"{times['disabled']:7.0f} us ({times['disabled'] - absent:+.0f} us)"),
+            ('installed, on', f"{times['enabled']:7.0f} us ({times['enabled'] - absent:+.0f} us)"),
+        ])
+        self.assertLess(times['disabled'], absent * 1.05)
+
+
+@contextmanager
+def sqlite_options(options, journal_mode):
+    # New thread connections read the shared settings dict; the journal mode is
+    # stored in the database file, so it is switched with no other connections open.
+    settings_dict = connections['default'].settings_dict
+    original = settings_dict['OPTIONS']
+    connections.close_all()
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode={journal_mode}')
+    settings_dict['OPTIONS'] = options
+    try:
+        yield
+    finally:
+        settings_dict['OPTIONS'] = original
+        connections.close_all()
+
+
+@skipUnless(BENCHMARKS, 'set LMS_BENCHMARKS=1')
+class ConcurrentEnrollmentWriteBenchmark(TransactionTestCase):
+    WORKERS = 8
+    WRITES = 200
+
+    def setUp(self):
+        self.instructor = make_user('instructor@example.com', role='instructor')
+        self.course = make_courses(self.instructor, 1)[0]
+        self.students = iter(make_students(self.WRITES * 4))
+
+    def enroll(self, student):
+        # Single create: the transaction starts with its INSERT.
+        client = APIClient()
+        client.force_authenticate(student)
+        return client.post('/api/lms/enrollments/', {'course': str(self.course.pk)}, format='json').status_code
+
+    def bulk_enroll(self, student):
+        # bulk_enroll validates with SELECTs before inserting, in one transaction.
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        return client.post('/api/lms/enrollments/bulk/', {
+            'enrollments': [{'student': str(student.pk), 'course': str(self.course.pk)}],
+        }, format='json').status_code
+
+    def run_writes(self, write):
+        students = [next(self.students) for _ in range(self.WRITES)]
+
+        def run(student):
+            try:
+                return write(student)
+            except OperationalError:
+                return 'locked'
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(self.WORKERS) as executor:
+            statuses = list(executor.map(run, students))
+        elapsed = time.perf_counter() - started
+        created = statuses.count(201)
+        return f'{created:4d}/{self.WRITES} created, {statuses.count("locked"):4d} locked, {created / elapsed:5.0f} writes/s'
+
+    def run_modes(self, write):
+        rows = []
+        if connection.vendor == 'sqlite':
+            with sqlite_options({}, 'DELETE'):
+                rows.append(('sqlite, Django defaults', self.run_writes(write)))
+            with sqlite_options(connection.settings_dict['OPTIONS'], 'WAL'):
+                rows.append(('sqlite, WAL + IMMEDIATE + busy_timeout', self.run_writes(write)))
+        else:
+            options = connection.settings_dict['OPTIONS']
+            mode = 'pool' if 'pool' in options else f"CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}"
+            rows.append((f'{connection.vendor}, {mode}', self.run_writes(write)))
+        return rows
+
+    def test_parallel_enrollment_writes(self):
+        report(f'{self.WORKERS} threads, POST /enrollments/', self.run_modes(self.enroll))
+        report(f'{self.WORKERS} threads, POST /enrollments/bulk/ (one pair each)', self.run_modes(self.bulk_enroll))
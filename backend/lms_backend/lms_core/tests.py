@@ -1,3 +1,1099 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlencode
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection, connections, router as db_router
+from django.db.models import Count, QuerySet, Sum
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from authentication.models import User
+from authentication.views import get_tokens_for_user
+from .cache import bump_cache_version, cache_is_shared, cache_timeout, get_cache_version
+from .checks import check_asgi_connections, check_replica_pin_cache, check_shared_cache
+from .counters import aggregate_dashboard_stats, read_dashboard_counters, reconcile_dashboard_counters
+from .enrollments import bulk_enroll
+from .filters import CourseFilterBackend
+from .images import variant_name
+from .instrumentation import RequestMetrics, finish_request_metrics
+from .middleware import PerformanceMiddleware
+from .progress import flush_progress
+from .routers import ReplicaRouter, replica_health, start_request
+from .models import Category, Course, Enrollment, EnrollmentDailyRollup
+from .pagination import CourseReportPagination, EnrollmentReportPagination
+from .projections import enrollment_count_subquery
+from .renderers import orjson
+from .serializers import CourseSerializer, EnrollmentSerializer
+
+
+def make_user(email, role='student', **extra):
+    extra = {'first_name': 'Test', 'last_name': role.title(), **extra}
+    return User.objects.create_user(email=email, password='password123', role=role, **extra)
+
+
+def auth_headers(user):
+    return {'Authorization': f"Bearer {get_tokens_for_user(user)['access']}"}
+
+
+def make_courses(instructor, count, category=None, **extra):
+    return Course.objects.bulk_create([
+        Course(title=f'Course {i}', description='About', instructor=instructor,
+               category=category, is_published=True, **extra)
+        for i in range(count)
+    ])
+
+
+def make_students(count, prefix='student'):
+    return User.objects.bulk_create([
+        User(email=f'{prefix}{i}@example.com', first_name='Student', last_name=str(i), role='student')
+        for i in range(count)
+    ])
+
+
+def jpeg_bytes(size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 60, 40)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def use_temp_media(test):
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+    settings = override_settings(MEDIA_ROOT=media_root)
+    settings.enable()
+    test.addCleanup(settings.disable)
+    return media_root
+
+
+def media_files(root):
+    return sorted(os.path.relpath(os.path.join(path, name), root) for path, _, names in os.walk(root) for name in names)
+
+
+class EnrollmentListQueryTests(TestCase):
+    def setUp(self):
+        self.admin = make_user('admin@example.com', role='admin')
+        self.instructor = make_user('instructor@example.com', role='instructor')
+        self.category = Category.objects.create(name='Programming')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def enroll(self, count, prefix='student'):
+        students = make_students(count, prefix)
+        courses = make_courses(self.instructor, count, category=self.category)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course) for student, course in zip(students, courses)
+        ])
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/lms/enrollments/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.data
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.enroll(10)
+        small, data = self.count_list_queries()
+        self.assertEqual(len(data), 10)
+
+        self.enroll(990, prefix='more')
+        large, data = self.count_list_queries()
+        self.assertEqual(len(data), 1000)
+        self.assertEqual(small, large)
+
+    def test_nested_course_details(self):
+        self.enroll(3)
+        course = Course.objects.first()
+        Enrollment.objects.create(student=make_user('extra@example.com'), course=course)
+
+        _, data = self.count_list_queries()
+        details = {str(row['course']): row['course_details'] for row in data}
+        self.assertEqual(details[str(course.pk)]['enrollment_count'], 2)
+        self.assertEqual(details[str(course.pk)]['category_name'], 'Programming')
+        self.assertEqual(details[str(course.pk)]['instructor_name'], 'Test Instructor')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class CourseListPlanTests(TestCase):
+    def setUp(self):
+        instructor = make_user('instructor@example.com', role='instructor')
+        courses = make_courses(instructor, 30)
+        students = make_students(5)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course=course) for student in students for course in courses[:3]
+        ])
+        self.client = APIClient()
+
+    def course_query_plan(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'FROM "courses"' in query['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('GROUP BY', sql[0])
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql[0])
+            return response, [row[-1] for row in cursor.fetchall()]
+
+    def test_default_ordering_walks_created_at_index(self):
+        _, plan = self.course_query_plan('/api/lms/courses/?page_size=20')
+        self.assertTrue(any(step.startswith('SCAN courses USING INDEX courses_') or
+                            step.startswith('SEARCH courses USING INDEX courses_') for step in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+    def test_price_ordering_uses_price_index(self):
+        _, plan = self.course_query_plan('/api/lms/courses/?page_size=20&ordering=price')
+        self.assertTrue(any('courses_price_idx' in step or 'courses_pub_price_idx' in step for step in plan), plan)
+        self.assertFalse(any('GROUP BY' in step for step in plan), plan)
+
+    def test_enrollment_count_ordering(self):
+        response = self.client.get('/api/lms/courses/?page_size=5&ordering=-enrollment_count')
+        self.assertEqual([course['enrollment_count'] for course in response.data['results']], [5, 5, 5, 0, 0])
+
+    def test_filter_ordering_matrix(self):
+        # Every filter CourseFilterBackend accepts against every ordering, on the
+        # first page and on a cursor page. The enrollment count is a correlated
+        # subquery probing the enrollments index, also in the cursor predicate.
+        # Only enrollment_count orderings may sort without a selective filter.
+        instructor = Course.objects.first().instructor
+        category = Category.objects.create(name='Programming')
+        for i, course in enumerate(Course.objects.order_by('pk')):
+            Course.objects.filter(pk=course.pk).update(
+                category=category if i % 2 else None, price=i * 5, duration=i,
+                difficulty=['beginner', 'intermediate', 'advanced'][i % 3],
+            )
+        filters = {
+            'none': {}, 'category': {'category': category.pk}, 'instructor': {'instructor': instructor.pk},
+            'difficulty': {'difficulty': 'beginner'}, 'is_published': {'is_published': 'true'},
+            'price': {'min_price': '10', 'max_price': '100'}, 'duration': {'min_duration': '2', 'max_duration': '25'},
+        }
+        sort_only = ('none', 'is_published')
+        orderings = ['', *[prefix + name for name in CourseFilterBackend.ordering_fields for prefix in ('', '-')]]
+
+        for filter_name, params in filters.items():
+            for ordering in orderings:
+                url = f"/api/lms/courses/?{urlencode({**params, 'ordering': ordering, 'page_size': 3})}"
+                expected = [str(pk) for pk in CourseFilterBackend().filter_queryset(
+                    Request(APIRequestFactory().get(url)),
+                    Course.objects.annotate(annotated_enrollment_count=enrollment_count_subquery()), None,
+                ).values_list('pk', flat=True)]
+                seen = []
+                for page in (1, 2):
+                    with self.subTest(filter=filter_name, ordering=ordering or 'default', page=page):
+                        response, plan = self.course_query_plan(url)
+                        seen += [course['id'] for course in response.data['results']]
+                        self.assertFalse(any(step.startswith(('SCAN U0', 'SCAN enrollments')) for step in plan), plan)
+                        if 'enrollment_count' in ordering:
+                            self.assertTrue(any(step.startswith('CORRELATED SCALAR SUBQUERY') for step in plan), plan)
+                        elif filter_name in sort_only:
+                            self.assertFalse(any(step == 'USE TEMP B-TREE FOR ORDER BY' for step in plan), plan)
+                        if 'enrollment_count' not in ordering or filter_name not in sort_only:
+                            self.assertNotIn('SCAN courses', plan)
+                    url = response.data['next']
+                    if url is None:
+                        break
+                self.assertEqual(seen, expected[:len(seen)], (filter_name, ordering))
+
+
+class CourseQueryCountTests(TestCase):
+    # The same number of queries for 10 and 1000 courses: related rows and
+    # enrollment counts are joined or annotated, never fetched per course.
+
+    def setUp(self):
+        self.instructor = make_user('instructor@example.com', role='instructor')
+        self.student = make_user('student@example.com')
+        self.admin = make_user('admin@example.com', role='admin')
+        self.category = Category.objects.create(name='Programming')
+        self.client = APIClient()
+
+    def add_courses(self, count):
+        courses = make_courses(self.instructor, count, category=self.category)
+        Enrollment.objects.bulk_create([Enrollment(student=self.student, course=course) for course in courses])
+
+    def assert_constant_queries(self, user, url, expected, rows=lambda data: data):
+        self.client.force_authenticate(user)
+        for total in (10, 1000):
+            self.add_courses(total - Course.objects.count())
+            cache.clear()
+            with self.subTest(courses=total), self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(rows(response.data)), total)
+
+    def test_course_list(self):
+        # The caller's enrolled course ids, then the courses.
+        self.assert_constant_queries(self.student, '/api/lms/courses/', 2)
+
+    def test_my_courses_instructor(self):
+        self.assert_constant_queries(self.instructor, '/api/lms/courses/my_courses/', 2)
+
+    def test_my_courses_student(self):
+        self.assert_constant_queries(self.student, '/api/lms/courses/my_courses/', 2)
+
+    def test_course_report(self):
+        self.assert_constant_queries(self.admin, '/api/lms/reports/courses/', 1)
+
+
+class DynamicFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = make_user('instructor@example.com', role='instructor', first_name='Ada')
+        self.courses = make_courses(self.instructor, 3)
+        self.student = make_user('student@example.com')
+        Enrollment.objects.bulk_create([Enrollment(student=self.student, course=course) for course in self.courses])
+        self.client = APIClient()
+
+    def test_fields_always_keep_id(self):
+        courses = self.client.get('/api/lms/courses/?fields=title,price').data
+        self.assertEqual([set(course) for course in courses], [{'id', 'title', 'price'}] * 3)
+        courses = self.client.get('/api/lms/courses/?fields=nonexistent').data
+        self.assertEqual([set(course) for course in courses], [{'id'}] * 3)
+
+    def test_expand_instructor_details_on_list(self):
+        with CaptureQueriesContext(connection) as plain:
+            self.client.get('/api/lms/courses/')
+        cache.clear()
+        with CaptureQueriesContext(connection) as expanded:
+            courses = self.client.get('/api/lms/courses/?expand=instructor_details').data
+        self.assertEqual([course['instructor_details']['first_name'] for course in courses], ['Ada'] * 3)
+        self.assertEqual(courses[0]['instructor_details']['email'], 'instructor@example.com')
+        # The instructor row is already joined for instructor_name.
+        self.assertEqual(len(expanded), len(plain))
+        self.assertNotIn('instructor_details', self.client.get('/api/lms/courses/?expand=unknown').data[0])
+
+    def test_nested_serializers_ignore_parameters(self):
+        self.client.force_authenticate(self.student)
+        enrollments = self.client.get('/api/lms/enrollments/?fields=course_details,status&expand=instructor_details').data
+        self.assertEqual(set(enrollments[0]), {'id', 'course_details', 'status'})
+        nested = enrollments[0]['course_details']
+        self.assertIn('title', nested)
+        self.assertIn('instructor_name', nested)
+        self.assertNotIn('instructor_details', nested)
+
+    def test_cache_key_differs_per_field_set(self):
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            first = self.client.get('/api/lms/courses/?fields=title').data
+            second = self.client.get('/api/lms/courses/?fields=price').data
+            expanded = self.client.get('/api/lms/courses/?fields=title&expand=instructor_details').data
+        keys = [call.args[0] for call in cache_set.call_args_list if isinstance(call.args[1], dict) and 'data' in call.args[1]]
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual(set(first[0]), {'id', 'title'})
+        self.assertEqual(set(second[0]), {'id', 'price'})
+        self.assertEqual(set(expanded[0]), {'id', 'title'})
+        # A repeat is served from its own entry.
+        self.assertEqual(self.client.get('/api/lms/courses/?fields=title').data, first)
+
+
+class MyCoursesTests(TestCase):
+    def test_counts_for_instructor_and_student(self):
+        instructor = make_user('instructor@example.com', role='instructor')
+        student = make_user('student@example.com')
+        courses = make_courses(instructor, 3)
+        Enrollment.objects.bulk_create([Enrollment(student=student, course=course) for course in courses[:2]])
+        Enrollment.objects.create(student=make_user('other@example.com'), course=courses[0])
+        client = APIClient()
+
+        client.force_authenticate(instructor)
+        counts = {course['id']: course['enrollment_count'] for course in client.get('/api/lms/courses/my_courses/').data}
+        self.assertEqual(counts, {str(courses[0].pk): 2, str(courses[1].pk): 1, str(courses[2].pk): 0})
+
+        client.force_authenticate(student)
+        counts = {course['id']: course['enrollment_count'] for course in client.get('/api/lms/courses/my_courses/').data}
+        self.assertEqual(counts, {str(courses[0].pk): 2, str(courses[1].pk): 1})
+
+
+def make_report_data():
+    # Unicode, escapes, decimals, an uncategorised course and a thumbnail, with
+    # distinct timestamps so every ordering is total.
+    now = timezone.now()
+    instructor = make_user('instructor@example.com', role='instructor', first_name='Zoë')
+    category = Category.objects.create(name='Design & "UX"')
+    titles = ['Café <basics>', 'Line\u2028separator', 'Emoji \U0001f600', 'Tab\tand \\slash', 'Plain', 'Zero', 'Long']
+    prices = ['19.90', '0.00', '1234.50', '5', '99.99', '0', '10.10']
+    courses = []
+    for i, (title, price) in enumerate(zip(titles, prices)):
+        course = Course.objects.create(
+            title=title, description=f'About {title}', instructor=instructor, price=price,
+            category=None if i == 3 else category, is_published=i % 2 == 0,
+            thumbnail=f'course_thumbnails/{i:02x}/photo.jpg' if i % 3 == 0 else None,
+        )
+        Course.objects.filter(pk=course.pk).update(created_at=now - datetime.timedelta(minutes=i))
+        courses.append(course)
+    students = make_students(4)
+    for i, course in enumerate(courses):
+        for j, student in enumerate(students[:i % 5]):
+            enrollment = Enrollment.objects.create(student=student, course=course, progress=i * 10 + j)
+            Enrollment.objects.filter(pk=enrollment.pk).update(enrolled_at=now - datetime.timedelta(minutes=i * 5 + j))
+    return courses
+
+
+def serializer_response_bytes(url, queryset, serializer_class, pagination_class):
+    # What the report views rendered before the projections: the serializer
+    # over model instances and the stock JSONRenderer.
+    request = Request(APIRequestFactory().get(url))
+    paginator = pagination_class()
+    page = paginator.paginate_queryset(queryset, request)
+    if page is None:
+        return JSONRenderer().render(serializer_class(queryset, many=True).data)
+    return JSONRenderer().render(paginator.get_paginated_response(serializer_class(page, many=True).data).data)
+
+
+class ReportBytesMixin:
+    def assert_same_bytes(self, url, queryset, serializer_class, pagination_class):
+        pages = 0
+        while url:
+            expected = serializer_response_bytes(url, queryset, serializer_class, pagination_class)
+            for fast_json in (True, False):
+                with self.subTest(url=url, orjson=fast_json), mock.patch('lms_core.renderers.orjson', orjson if fast_json else None):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.content, expected)
+            url = json.loads(expected)['next'] if isinstance(json.loads(expected), dict) else None
+            pages += 1
+        return pages
+
+
+class CourseReportTests(ReportBytesMixin, TestCase):
+    def setUp(self):
+        self.admin = make_user('admin@example.com', role='admin')
+        self.courses = make_report_data()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def serializer_queryset(self):
+        return Course.objects.select_related('instructor', 'category').annotate(
+            annotated_enrollment_count=Count('enrollments')
+        ).order_by('-created_at')
+
+    def test_pages_match_course_serializer_bytes(self):
+        pages = self.assert_same_bytes(
+            '/api/lms/reports/courses/?page_size=2', self.serializer_queryset(), CourseSerializer, CourseReportPagination
+        )
+        self.assertEqual(pages, 4)
+
+    def test_list_matches_course_serializer_bytes(self):
+        self.assert_same_bytes('/api/lms/reports/courses/', self.serializer_queryset(), CourseSerializer, CourseReportPagination)
+
+    def test_enrollment_counts(self):
+        rows = self.client.get('/api/lms/reports/courses/').json()
+        self.assertEqual(
+            {row['id']: row['enrollment_count'] for row in rows},
+            {str(course.pk): i % 5 for i, course in enumerate(self.courses)},
+        )
+
+    def test_csv_export_counts(self):
+        response = self.client.get('/api/lms/reports/courses/?format=csv')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().split('\r\n')[:-1]
+        header = lines[0].split(',')
+        counts = sorted(int(line.split(',')[header.index('enrollment_count')]) for line in lines[1:])
+        self.assertEqual(counts, sorted(i % 5 for i in range(7)))
+
+
+class EnrollmentReportTests(ReportBytesMixin, TestCase):
+    def setUp(self):
+        self.admin = make_user('admin@example.com', role='admin')
+        self.courses = make_report_data()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def serializer_queryset(self):
+        return Enrollment.objects.select_related('student', 'course', 'course__instructor').order_by('-enrolled_at')
+
+    def test_pages_match_enrollment_serializer_bytes(self):
+        pages = self.assert_same_bytes(
+            '/api/lms/reports/enrollments/?page_size=3', self.serializer_queryset(), EnrollmentSerializer, EnrollmentReportPagination
+        )
+        self.assertEqual(pages, 4)
+
+    @mock.patch('lms_core.projections.COUNT_BATCH_SIZE', 2)
+    def test_list_matches_enrollment_serializer_bytes(self):
+        self.assert_same_bytes('/api/lms/reports/enrollments/', self.serializer_queryset(), EnrollmentSerializer, EnrollmentReportPagination)
+
+    def test_counts_only_the_page_courses(self):
+        url = '/api/lms/reports/enrollments/?page_size=3'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            url = response.data['next']
+            count_sql = [query['sql'] for query in queries if 'GROUP BY' in query['sql']]
+            self.assertEqual(len(count_sql), 1)
+            self.assertIn('"course_id" IN', count_sql[0])
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.admin = make_user('admin@example.com', role='admin')
+        instructor = make_user('instructor@example.com', role='instructor')
+        make_courses(instructor, 3)
+
+    def test_wsgi_export_streams_sync_iterator(self):
+        response = Client().get('/api/lms/reports/courses/?format=ndjson', headers=auth_headers(self.admin))
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+
+    async def test_asgi_export_streams_async_iterator(self):
+        headers = await sync_to_async(auth_headers)(self.admin)
+        response = await AsyncClient().get('/api/lms/reports/courses/?format=ndjson', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        rows = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual(sorted(row['title'] for row in rows), ['Course 0', 'Course 1', 'Course 2'])
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+FILE_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/lms-tests-cache'}}
+
+
+class CacheTimeoutTests(TestCase):
+    @override_settings(CACHES=LOCMEM_CACHE, LMS_LOCAL_CACHE_TIMEOUT=5)
+    def test_per_process_cache_uses_short_timeout(self):
+        self.assertFalse(cache_is_shared())
+        self.assertEqual(cache_timeout(3600), 5)
+        self.assertEqual(cache_timeout(2), 2)
+
+    @override_settings(CACHES=FILE_CACHE)
+    def test_shared_cache_keeps_timeout(self):
+        self.assertTrue(cache_is_shared())
+        self.assertEqual(cache_timeout(3600), 3600)
+
+    @override_settings(CACHES=FILE_CACHE)
+    def test_version_counter_does_not_expire(self):
+        cache.clear()
+        bump_cache_version('courses')
+        bump_cache_version('courses')
+        later = time.time() + 24 * 60 * 60
+        with mock.patch('django.core.cache.backends.filebased.time.time', return_value=later):
+            self.assertEqual(get_cache_version('courses'), 3)
+
+    @override_settings(CACHES=LOCMEM_CACHE, LMS_LOCAL_CACHE_TIMEOUT=5)
+    def test_category_list_expires_quickly_in_local_cache(self):
+        Category.objects.create(name='Music')
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            response = APIClient().get('/api/lms/categories/')
+        self.assertEqual(response.status_code, 200)
+        timeouts = [call.args[2] for call in cache_set.call_args_list if ':categories:' in call.args[0]]
+        self.assertEqual(timeouts, [5])
+
+
+class CourseResponseCacheTests(TestCase):
+    @override_settings(CACHES=LOCMEM_CACHE, LMS_LOCAL_CACHE_TIMEOUT=5)
+    def test_course_list_expires_quickly_in_local_cache(self):
+        make_courses(make_user('instructor@example.com', role='instructor'), 2)
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            response = APIClient().get('/api/lms/courses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response.headers)
+        timeouts = [call.args[2] for call in cache_set.call_args_list if isinstance(call.args[1], dict) and 'data' in call.args[1]]
+        self.assertEqual(timeouts, [5])
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_deploy_check_warns_about_local_cache(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['lms_core.W001'])
+
+    @override_settings(CACHES=FILE_CACHE)
+    def test_deploy_check_accepts_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class DatabaseConfigTests(TestCase):
+    def test_connections_are_not_persistent_by_default(self):
+        self.assertEqual(check_asgi_connections(), [])
+
+    def test_persistent_connections_are_rejected_under_asgi(self):
+        errors = check_asgi_connections({
+            'default': {'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'max_size': 20}}},
+            'replica': {'CONN_MAX_AGE': 60},
+        })
+        self.assertEqual([error.id for error in errors], ['lms_core.E001'])
+        self.assertIn("'replica'", errors[0].msg)
+
+
+@override_settings(CACHES=FILE_CACHE, LMS_REPLICA_PIN_SECONDS=15)
+class ReplicaRoutingTests(TestCase):
+    # No replica database exists in tests: the router is installed with the
+    # replica reported unusable, so queries still run on the primary and the
+    # routing decision is observed on the per-request state.
+
+    def setUp(self):
+        cache.clear()
+        patchers = [
+            mock.patch(target, return_value='replica')
+            for target in ('lms_core.routers.replica_alias', 'lms_core.middleware.replica_alias', 'lms_core.checks.replica_alias')
+        ]
+        patchers.append(mock.patch.object(replica_health, 'is_usable', return_value=False))
+        patchers.append(mock.patch.object(db_router, 'routers', [ReplicaRouter()]))
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.course = make_courses(make_user('instructor@example.com', role='instructor'), 1)[0]
+        self.student = make_user('student@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def request_state(self, method, url, client=None, **kwargs):
+        states = []
+        with mock.patch('lms_core.middleware.start_request', side_effect=lambda: states.append(start_request()) or states[-1]):
+            response = getattr(client or self.client, method)(url, **kwargs)
+        return response, states[0]
+
+    def test_writes_always_go_to_primary(self):
+        router = ReplicaRouter()
+        state = start_request()
+        state.read_replica = True
+        with mock.patch.object(replica_health, 'is_usable', return_value=True):
+            self.assertEqual(router.db_for_read(Course), 'replica')
+        self.assertEqual(router.db_for_write(Course), 'default')
+        # Later reads in the same request follow the write.
+        self.assertIsNone(router.db_for_read(Course))
+
+    def test_reads_after_a_write_use_primary(self):
+        _, state = self.request_state('get', '/api/lms/courses/')
+        self.assertTrue(state.read_replica)
+
+        response, state = self.request_state('post', '/api/lms/enrollments/', data={'course': str(self.course.pk)}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(state.wrote)
+
+        # Past the catalog's own post-change window, only the writer stays pinned.
+        other = APIClient()
+        other.force_authenticate(make_user('other@example.com'))
+        with mock.patch('time.time', return_value=time.time() + 8):
+            _, state = self.request_state('get', '/api/lms/courses/')
+            self.assertFalse(state.read_replica)
+            _, state = self.request_state('get', '/api/lms/courses/', client=other)
+            self.assertTrue(state.read_replica)
+
+    def test_pin_expires(self):
+        self.request_state('post', '/api/lms/enrollments/', data={'course': str(self.course.pk)}, format='json')
+        with mock.patch('time.time', return_value=time.time() + 16):
+            _, state = self.request_state('get', '/api/lms/courses/')
+        self.assertTrue(state.read_replica)
+
+    def test_replica_requires_shared_cache(self):
+        self.assertEqual(check_replica_pin_cache(None), [])
+        with override_settings(CACHES=LOCMEM_CACHE):
+            self.assertEqual([error.id for error in check_replica_pin_cache(None)], ['lms_core.E002'])
+
+
+@mock.patch('lms_core.search.SEARCH_RESULT_LIMIT', 3)
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor@example.com', role='instructor')
+        for i in range(5):
+            # Ranks above the published courses: "python" twice in a short title.
+            Course.objects.create(title=f'Python python draft {i}', description='Draft', instructor=self.instructor)
+        for i, difficulty in enumerate(['beginner', 'advanced', 'advanced', 'beginner']):
+            Course.objects.create(title=f'Python {i}', description='Published', instructor=self.instructor,
+                                  difficulty=difficulty, is_published=True)
+        self.client = APIClient()
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sorted(course['title'] for course in response.data)
+
+    def test_limit_counts_only_visible_courses(self):
+        titles = self.titles('/api/lms/courses/?search=python')
+        self.assertEqual(len(titles), 3)
+        self.assertTrue(all('draft' not in title for title in titles), titles)
+
+    def test_request_filters_apply_before_limit(self):
+        self.assertEqual(self.titles('/api/lms/courses/?search=python&difficulty=advanced'), ['Python 1', 'Python 2'])
+
+    def test_instructor_sees_own_drafts(self):
+        self.client.force_authenticate(self.instructor)
+        self.assertEqual(len(self.titles('/api/lms/courses/?search=draft')), 3)
+
+    def test_search_pages_follow_relevance(self):
+        # Created most relevant first, so newest-first order would reverse them.
+        for title in ['Rust rust rust', 'Rust rust basics', 'Rust for experienced programmers']:
+            Course.objects.create(title=title, description='Systems', instructor=self.instructor, is_published=True)
+        ranked = [course['title'] for course in self.client.get('/api/lms/courses/?search=rust').data]
+        self.assertEqual(ranked, ['Rust rust rust', 'Rust rust basics', 'Rust for experienced programmers'])
+
+        titles, url = [], '/api/lms/courses/?search=rust&page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles += [course['title'] for course in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(titles, ranked)
+
+    def test_instructor_rename_reindexes_courses(self):
+        instructor = User.objects.get(pk=self.instructor.pk)
+        instructor.last_name = 'Lovelace'
+        instructor.save()
+        self.assertEqual(len(self.titles('/api/lms/courses/?search=lovelace')), 3)
+
+    def test_other_instructor_saves_skip_reindex(self):
+        with mock.patch('lms_core.search.index_instructor_courses') as reindex:
+            instructor = User.objects.get(pk=self.instructor.pk)
+            update_last_login(None, instructor)
+            instructor.bio = 'Teaches Python'
+            instructor.save()
+            instructor.first_name = 'Ada'
+            instructor.save(update_fields=['bio'])
+        reindex.assert_not_called()
+
+
+@override_settings(LMS_DASHBOARD_COUNTERS=True)
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor@example.com', role='instructor')
+        self.courses = make_courses(self.instructor, 3)
+        self.students = make_students(4)
+        reconcile_dashboard_counters()
+        self.enrollments = [Enrollment.objects.create(student=student, course=self.courses[0]) for student in self.students]
+
+    def assert_counters_match(self):
+        self.assertEqual(read_dashboard_counters(), aggregate_dashboard_stats())
+
+    def test_signals_track_creates(self):
+        counters = read_dashboard_counters()
+        self.assertEqual((counters['total_enrollments'], counters['active_enrollments']), (4, 4))
+        self.assert_counters_match()
+
+    def test_status_change(self):
+        enrollment = Enrollment.objects.get(pk=self.enrollments[0].pk)
+        enrollment.status = 'completed'
+        enrollment.save()
+        self.assertEqual(read_dashboard_counters()['active_enrollments'], 3)
+
+        course = self.courses[1]
+        course.is_published = False
+        course.save()
+        user = self.students[0]
+        user.role = 'instructor'
+        user.save()
+        self.assert_counters_match()
+
+    def test_delete(self):
+        self.enrollments[0].delete()
+        self.assertEqual(read_dashboard_counters()['total_enrollments'], 3)
+        # Cascaded enrollments are counted down too.
+        self.courses[0].delete()
+        self.students[1].delete()
+        self.assert_counters_match()
+
+    def test_reconcile_repairs_bulk_changes(self):
+        # Queryset updates bypass the signals.
+        Enrollment.objects.filter(course=self.courses[0]).update(status='dropped')
+        self.assertEqual(read_dashboard_counters()['active_enrollments'], 4)
+        reconcile_dashboard_counters()
+        self.assertEqual(read_dashboard_counters()['active_enrollments'], 0)
+        self.assert_counters_match()
+
+    def test_dashboard_reads_one_query(self):
+        client = APIClient()
+        client.force_authenticate(make_user('admin@example.com', role='admin'))
+        with self.assertNumQueries(1):
+            response = client.get('/api/lms/dashboard/stats/')
+        self.assertEqual(response.data, aggregate_dashboard_stats())
+
+
+class BulkEnrollTests(TestCase):
+    def setUp(self):
+        self.instructor = make_user('instructor@example.com', role='instructor')
+        self.courses = make_courses(self.instructor, 2)
+        self.students = make_students(3)
+
+    def enrolled_total(self):
+        return EnrollmentDailyRollup.objects.aggregate(total=Sum('enrolled'))['total'] or 0
+
+    @override_settings(LMS_DASHBOARD_COUNTERS=True)
+    def test_rows_inserted_concurrently_are_not_counted(self):
+        reconcile_dashboard_counters()
+        racer = (self.students[0], self.courses[0])
+        real_bulk_create = QuerySet.bulk_create
+
+        def racing_bulk_create(queryset, objs, *args, **kwargs):
+            # Another request enrolls the same pair after validation ran.
+            Enrollment.objects.create(student=racer[0], course=racer[1])
+            return real_bulk_create(queryset, objs, *args, **kwargs)
+
+        pairs = [(student.pk, course.pk) for student in self.students for course in self.courses]
+        with mock.patch.object(QuerySet, 'bulk_create', racing_bulk_create):
+            results = bulk_enroll(pairs, self.instructor)
+
+        statuses = {(result['student'], result['course']): result['status'] for result in results}
+        self.assertEqual(statuses.pop((racer[0].pk, racer[1].pk)), 'already_enrolled')
+        self.assertEqual(set(statuses.values()), {'created'})
+        self.assertEqual(Enrollment.objects.count(), 6)
+        self.assertEqual(self.enrolled_total(), 6)
+        self.assertEqual(read_dashboard_counters()['total_enrollments'], 6)
+        self.assertEqual(read_dashboard_counters()['active_enrollments'], 6)
+
+    def test_endpoint_reports_created_and_skipped(self):
+        Enrollment.objects.create(student=self.students[0], course=self.courses[0])
+        client = APIClient()
+        client.force_authenticate(self.instructor)
+        response = client.post('/api/lms/enrollments/bulk/', {'enrollments': [
+            {'student': str(self.students[0].pk), 'course': str(self.courses[0].pk)},
+            {'student': str(self.students[1].pk), 'course': str(self.courses[0].pk)},
+            {'student': str(self.students[1].pk), 'course': str(self.courses[0].pk)},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['skipped']), (1, 2))
+        self.assertEqual([result['status'] for result in response.data['results']], ['already_enrolled', 'created', 'duplicate'])
+        self.assertEqual(self.enrolled_total(), 2)
+
+
+class ProgressBufferTests(TestCase):
+    def setUp(self):
+        self.student = make_user('student@example.com')
+        course = make_courses(make_user('instructor@example.com', role='instructor'), 1)[0]
+        self.enrollment = Enrollment.objects.create(student=self.student, course=course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def tick(self, progress):
+        return self.client.post(f'/api/lms/enrollments/{self.enrollment.pk}/progress/', {'progress': progress}, format='json')
+
+    def stored_progress(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment.progress
+
+    @override_settings(CACHES=FILE_CACHE, LMS_PROGRESS_FLUSH_INTERVAL=60)
+    def test_shared_cache_buffers_until_flush(self):
+        cache.clear()
+        self.assertEqual(self.tick(30).status_code, 202)
+        self.assertEqual(self.tick(40).status_code, 202)
+        self.assertEqual(self.stored_progress(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(flush_progress(include_current=True), 1)
+        self.assertEqual(self.stored_progress(), 40)
+        self.assertEqual(flush_progress(include_current=True), 0)
+
+    @override_settings(CACHES=FILE_CACHE, LMS_PROGRESS_FLUSH_INTERVAL=60)
+    def test_failed_flush_keeps_buffer(self):
+        cache.clear()
+        self.tick(30)
+        self.tick(55)
+        with mock.patch.object(QuerySet, 'bulk_update', side_effect=DatabaseError('locked')):
+            with self.assertRaises(DatabaseError):
+                flush_progress(include_current=True)
+        self.assertEqual(self.stored_progress(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(flush_progress(include_current=True), 1)
+        self.assertEqual(self.stored_progress(), 55)
+
+    @override_settings(CACHES=FILE_CACHE, LMS_PROGRESS_FLUSH_INTERVAL=60)
+    def test_buffer_outlives_a_quiet_period(self):
+        cache.clear()
+        self.tick(30)
+        self.tick(80)
+        # No ticks for a day; then the flusher runs.
+        later = time.time() + 24 * 60 * 60
+        with mock.patch('django.core.cache.backends.filebased.time.time', return_value=later):
+            for _ in range(2):
+                with self.captureOnCommitCallbacks(execute=True):
+                    flush_progress()
+        self.assertEqual(self.stored_progress(), 80)
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_per_process_cache_writes_through(self):
+        self.assertEqual(self.tick(30).status_code, 202)
+        self.assertEqual(self.stored_progress(), 30)
+        self.tick(20)
+        self.assertEqual(self.stored_progress(), 30)
+
+
+class EnrollmentAnalyticsSpanTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('admin@example.com', role='admin'))
+
+    def series(self, **params):
+        return self.client.get('/api/lms/analytics/enrollments/', params)
+
+    def test_longest_allowed_spans(self):
+        for period, start, end, count in [
+            ('day', '2024-01-01', '2024-12-31', 366),
+            ('week', '2022-01-03', '2025-01-05', 157),
+            ('month', '2015-01-31', '2024-12-01', 120),
+        ]:
+            response = self.series(period=period, start=start, end=end)
+            self.assertEqual(response.status_code, 200, period)
+            self.assertEqual(len(response.data['results']), count, period)
+
+    def test_longer_spans_are_rejected(self):
+        for period, start, end in [
+            ('day', '2024-01-01', '2025-01-01'),
+            ('week', '2022-01-03', '2025-01-06'),
+            ('month', '2015-01-01', '2025-01-01'),
+        ]:
+            response = self.series(period=period, start=start, end=end)
+            self.assertEqual(response.status_code, 400, period)
+            self.assertIn('start', response.data)
+
+    def test_open_ended_start_counts_up_to_today(self):
+        self.assertEqual(self.series(start='2000-01-01').status_code, 400)
+        response = self.series(start=str(timezone.localdate() - datetime.timedelta(days=10)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 11)
+
+    def test_default_window(self):
+        response = self.series(period='week', end='2024-06-30')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 12)
+
+
+@override_settings(LMS_IMAGE_VARIANT_WIDTHS=[320, 640])
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = use_temp_media(self)
+        self.source = default_storage.save('course_thumbnails/photo.jpg', ContentFile(jpeg_bytes()))
+
+    def get(self, name):
+        return Client().get(f'/media/{name}')
+
+    def test_variant_is_rendered_on_first_request(self):
+        response = self.get(variant_name(self.source, 320, 'webp'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertTrue(default_storage.exists(variant_name(self.source, 640, 'jpg')))
+
+    def test_variant_of_a_variant_is_not_rendered(self):
+        self.assertEqual(self.get(variant_name(self.source, 320, 'webp')).status_code, 200)
+        files = media_files(self.media_root)
+        nested = variant_name(variant_name(self.source, 640, 'webp'), 320, 'webp')
+        self.assertEqual(self.get(nested).status_code, 404)
+        self.assertEqual(self.get(variant_name(nested, 320, 'webp')).status_code, 404)
+        self.assertEqual(media_files(self.media_root), files)
+
+    def test_unlisted_width_is_not_rendered(self):
+        self.assertEqual(self.get(variant_name(self.source, 321, 'webp')).status_code, 404)
+        self.assertEqual(media_files(self.media_root), [self.source])
+
+    def test_source_outside_upload_directories_is_not_rendered(self):
+        other = default_storage.save('exports/photo.jpg', ContentFile(jpeg_bytes()))
+        self.assertEqual(self.get(variant_name(other, 320, 'webp')).status_code, 404)
+        self.assertEqual(media_files(self.media_root), sorted([self.source, other]))
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = use_temp_media(self)
+        self.name = default_storage.save('exports/data.bin', ContentFile(bytes(range(100))))
+
+    def get(self, **headers):
+        return Client().get(f'/media/{self.name}', headers=headers)
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_single_range(self):
+        response = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+    def test_open_and_suffix_ranges(self):
+        response = self.get(Range='bytes=95-')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 95-99/100'))
+        response = self.get(Range='bytes=-5')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 95-99/100'))
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(95, 100)))
+        # The end is clamped to the file.
+        response = self.get(Range='bytes=90-500')
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 90-99/100'))
+
+    def test_range_past_end_is_unsatisfiable(self):
+        response = self.get(Range='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_invalid_range_serves_full_file(self):
+        for header in ['bytes=5-3', 'bytes=0-1,5-6', 'items=0-1', 'bytes=-']:
+            with self.subTest(header=header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+        response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get(If_None_Match='"stale"').status_code, 200)
+
+    def test_if_range_with_stale_etag_serves_full_file(self):
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range='"stale"').status_code, 200)
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range=self.get()['ETag']).status_code, 206)
+
+    @override_settings(LMS_MEDIA_OFFLOAD='x-accel-redirect', LMS_MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_x_accel_redirect(self):
+        response = self.get(Range='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+    @override_settings(LMS_MEDIA_OFFLOAD='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.name))
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(LMS_PERF_INSTRUMENTATION=True, LMS_PERF_SAMPLE_RATE=1.0, CACHES=LOCMEM_CACHE)
+class PerformanceInstrumentationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user('admin@example.com', role='admin')
+        instructor = make_user('instructor@example.com', role='instructor')
+        self.courses = make_courses(instructor, 4)
+        Enrollment.objects.bulk_create([Enrollment(student=student, course=self.courses[0]) for student in make_students(3)])
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_server_timing_header(self):
+        with self.assertLogs('lms_core.instrumentation', 'INFO') as logs:
+            response = self.client.get('/api/lms/enrollments/')
+        self.assertEqual(response.status_code, 200)
+        entries = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(set(entries), {'total', 'db', 'serializer'})
+        self.assertRegex(entries['db'], r'^dur=[\d.]+;desc="[1-9]\d* queries"$')
+        self.assertRegex(entries['serializer'], r'^dur=[\d.]+$')
+        self.assertGreater(float(entries['serializer'][4:]), 0)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record['route'], record['status'], record['duplicate_queries']), ('api/lms/enrollments/$', 200, []))
+
+    def test_n_plus_one_loop_is_flagged(self):
+        metrics = RequestMetrics()
+        with metrics.capture():
+            names = [course.instructor.email for course in Course.objects.all()]
+        self.assertEqual(len(names), 4)
+        [(sql, count)] = metrics.duplicates()
+        self.assertEqual(count, 4)
+        self.assertIn('FROM "users"', sql)
+
+        response = HttpResponse()
+        with self.assertLogs('lms_core.instrumentation', 'WARNING') as logs:
+            finish_request_metrics(metrics, RequestFactory().get('/'), response)
+        self.assertIn('dupq;desc="1 repeated statements"', response['Server-Timing'])
+        self.assertEqual(json.loads(logs.records[0].getMessage())['duplicate_queries'][0]['count'], 4)
+
+    def test_sampled_stats_endpoint(self):
+        self.client.get('/api/lms/enrollments/')
+        stats = self.client.get('/api/lms/perf/stats/').data
+        self.assertEqual(stats['GET api/lms/enrollments/$']['samples'], 1)
+
+    @override_settings(LMS_PERF_INSTRUMENTATION=False)
+    def test_disabled_middleware_is_not_used(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            PerformanceMiddleware(lambda request: HttpResponse())
+        self.assertNotIn('Server-Timing', self.client.get('/api/lms/enrollments/'))
+
+
+class EnrollmentCreateTests(TestCase):
+    def setUp(self):
+        self.course = make_courses(make_user('instructor@example.com', role='instructor'), 1)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('student@example.com'))
+        cache.clear()
+
+    def enroll(self, **headers):
+        return self.client.post('/api/lms/enrollments/', {'course': str(self.course.pk)}, format='json', headers=headers)
+
+    def test_duplicate_enrollment_conflicts(self):
+        self.assertEqual(self.enroll().status_code, 201)
+        self.assertEqual(self.enroll().status_code, 409)
+        self.assertEqual(Enrollment.objects.count(), 1)
+
+    def test_idempotency_key_replays_response(self):
+        first = self.enroll(**{'Idempotency-Key': 'k1'})
+        second = self.enroll(**{'Idempotency-Key': 'k1'})
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(first.data['id'], second.data['id'])
+
+        response = self.client.post('/api/lms/enrollments/', {'course': str(uuid.uuid4())},
+                                    format='json', headers={'Idempotency-Key': 'k1'})
+        self.assertEqual(response.status_code, 422)
+
+
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        self.course = make_courses(make_user('instructor@example.com', role='instructor'), 1)[0]
+        self.student = make_user('student@example.com')
+        cache.clear()
+
+    def run_concurrently(self, request, count=16):
+        def run(_):
+            try:
+                return request()
+            finally:
+                connections.close_all()
+        with ThreadPoolExecutor(self.workers) as executor:
+            return list(executor.map(run, range(count)))
+
+    def test_concurrent_creates_insert_once(self):
+        def post():
+            client = APIClient()
+            client.force_authenticate(self.student)
+            return client.post('/api/lms/enrollments/', {'course': str(self.course.pk)}, format='json').status_code
+
+        statuses = self.run_concurrently(post)
+        self.assertEqual(sorted(statuses), [201] + [409] * 15)
+        self.assertEqual(Enrollment.objects.count(), 1)
+
+    def test_async_handlers_under_thread_pool(self):
+        # Each worker drives the ASGI stack from its own event loop, so the
+        # sync enrollment handler and the async catalog handler run concurrently.
+        headers = {**auth_headers(self.student), 'Idempotency-Key': 'same-key'}
+
+        async def post():
+            response = await AsyncClient().post(
+                '/api/lms/enrollments/', {'course': str(self.course.pk)},
+                content_type='application/json', headers=headers,
+            )
+            return response.status_code, response.json().get('id')
+
+        async def browse():
+            response = await AsyncClient().get('/api/lms/courses/')
+            return response.status_code, [course['id'] for course in response.json()]
+
+        results = self.run_concurrently(lambda: async_to_sync(post)())
+        results += self.run_concurrently(lambda: async_to_sync(browse)(), count=8)
+
+        enrollment = Enrollment.objects.get()
+        for status, body in results[:16]:
+            self.assertIn(status, (201, 409))
+            if status == 201:
+                self.assertEqual(body, str(enrollment.pk))
+        self.assertIn(201, [status for status, _ in results[:16]])
+        self.assertEqual(results[16:], [(200, [str(self.course.pk)])] * 8)
+        self.assertEqual(async_to_sync(post)(), (201, str(enrollment.pk)))
@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet, CourseViewSet, EnrollmentViewSet,
-    DashboardStatsView, EnrollmentReportView, CourseReportView
+    DashboardStatsView, EnrollmentReportView, CourseReportView, CacheStatsView,
+    PerformanceStatsView, EnrollmentAnalyticsView
 )
 
 router = DefaultRouter()
@@ -15,4 +16,7 @@ urlpatterns = [
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('reports/enrollments/', EnrollmentReportView.as_view(), name='enrollment-report'),
     path('reports/courses/', CourseReportView.as_view(), name='course-report'),
+    path('analytics/enrollments/', EnrollmentAnalyticsView.as_view(), name='enrollment-analytics'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('perf/stats/', PerformanceStatsView.as_view(), name='perf-stats'),
 ]
\ No newline at end of file
@@ -1,17 +1,84 @@
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
 from rest_framework import status, generics, viewsets
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
-from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.renderers import JSONRenderer
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Q, F
+from django.http import Http404
+from django.http import StreamingHttpResponse
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
 
-from .models import Category, Course, Enrollment
+from .models import Category, Course, Enrollment, EnrollmentDailyRollup
 from authentication.models import User
 from .serializers import (
-    CategorySerializer, CourseSerializer, CourseCreateUpdateSerializer,
-    EnrollmentSerializer, DashboardStatsSerializer
+    CategorySerializer, CourseSerializer, CourseListSerializer, CourseCreateUpdateSerializer,
+    EnrollmentSerializer, EnrollmentDetailSerializer, DashboardStatsSerializer, BulkEnrollmentSerializer,
+    EnrollmentProgressSerializer, EnrollmentAnalyticsQuerySerializer
 )
 from .permissions import IsAdminOrInstructor, IsAdmin, IsStudent, IsOwnerOrAdmin
+from .pagination import (
+    CourseCursorPagination, EnrollmentCursorPagination,
+    CourseReportPagination, EnrollmentReportPagination
+)
+from .renderers import CSVRenderer, NDJSONRenderer, StreamingRowRenderer, FastJSONRenderer
+from .projections import course_report_rows, enrollment_report_rows, enrollment_count_subquery
+from .counters import counters_enabled, aaggregate_dashboard_stats, read_dashboard_counters
+from .cache import versioned_cache_key, cache_timeout, CachedResponseMixin, get_cache_stats
+from .instrumentation import get_performance_stats, reset_performance_stats
+from .serializers import get_enrolled_course_ids, aget_enrolled_course_ids
+from .filters import CourseFilterBackend
+from .enrollments import bulk_enroll
+from .analytics import enrollment_series
+from .progress import enrollment_owner, record_progress, complete_enrollment
+from .idempotency import idempotent
+from .routers import ReplicaReadMixin
+from .async_views import AsyncDispatchMixin, aiterate
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+CATEGORY_LIST_CACHE_TIMEOUT = 60 * 60
+
+REPORT_RENDERER_CLASSES = [
+    FastJSONRenderer if renderer is JSONRenderer else renderer
+    for renderer in api_settings.DEFAULT_RENDERER_CLASSES
+] + [CSVRenderer, NDJSONRenderer]
+
+ENROLLMENT_EXPORT_FIELDS = [
+    'id', 'student_id', 'student_email', 'student_first_name', 'student_last_name',
+    'course_id', 'course_title', 'status', 'progress', 'enrolled_at', 'completed_at'
+]
+
+COURSE_EXPORT_FIELDS = [
+    'id', 'title', 'category_id', 'category_name', 'instructor_id', 'instructor_email',
+    'instructor_first_name', 'instructor_last_name', 'difficulty', 'duration', 'price',
+    'is_published', 'enrollment_count', 'created_at', 'updated_at'
+]
+
+
+def streaming_export(request, rows, fields, filename):
+    renderer = request.accepted_renderer
+    chunks = renderer.stream(rows, fields)
+    if isinstance(request._request, ASGIRequest):
+        # ASGI reads a sync iterator to the end before sending anything.
+        chunks = aiterate(chunks)
+    response = StreamingHttpResponse(
+        chunks,
+        content_type=f'{renderer.media_type}; charset={renderer.charset}'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -24,15 +91,35 @@ class CategoryViewSet(viewsets.ModelViewSet):
         else:
             permission_classes = [IsAuthenticated, IsAdminOrInstructor]
         return [permission() for permission in permission_classes]
+    
+    def get_queryset(self):
+        return Category.objects.annotate(
+            annotated_course_count=Count('courses', filter=Q(courses__is_published=True)),
+            annotated_total_course_count=Count('courses'),
+        ).order_by('name')
+    
+    def list(self, request, *args, **kwargs):
+        # Invalidated by bumping the 'categories' version on Category/Course changes.
+        cache_key = versioned_cache_key('categories', 'list')
+        data = cache.get(cache_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(cache_key, data, cache_timeout(CATEGORY_LIST_CACHE_TIMEOUT))
+        return Response(data)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(AsyncDispatchMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
+    pagination_class = CourseCursorPagination
+    filter_backends = [CourseFilterBackend]
+    cache_namespace = 'courses'
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return CourseCreateUpdateSerializer
-        return CourseSerializer
+        if self.action == 'retrieve':
+            return CourseSerializer
+        return CourseListSerializer
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -47,32 +134,123 @@ class CourseViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = Course.objects.select_related('instructor', 'category').annotate(
-            annotated_enrollment_count=Count('enrollments')
+            annotated_enrollment_count=enrollment_count_subquery()
         )
 
-        if self.request.user.is_authenticated and self.request.user.role == 'admin':
-            return queryset
-
-        q_filter = Q(is_published=True)
+        if not (self.request.user.is_authenticated and self.request.user.role == 'admin'):
+            q_filter = Q(is_published=True)
 
-        if self.request.user.is_authenticated and self.request.user.role == 'instructor':
-            q_filter |= Q(instructor=self.request.user)
+            if self.request.user.is_authenticated and self.request.user.role == 'instructor':
+                q_filter |= Q(instructor=self.request.user)
             
-        return queryset.filter(q_filter)
+            queryset = queryset.filter(q_filter)
+        
+        return queryset
+    
+    @property
+    def search_query(self):
+        return self.request.query_params.get('search', '').strip()
+    
+    async def list(self, request, *args, **kwargs):
+        self.enrolled_course_ids = await aget_enrolled_course_ids({'request': request})
+        return await self.acached_response(self.alist, request, *args, **kwargs)
+    
+    async def retrieve(self, request, *args, **kwargs):
+        self.enrolled_course_ids = await aget_enrolled_course_ids({'request': request})
+        return await self.acached_response(self.aretrieve, request, *args, **kwargs)
+    
+    async def alist(self, request, *args, **kwargs):
+        if self.search_query:
+            # Ranking runs its own SQL while filtering the queryset.
+            queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+        
+        if self.paginator is not None and self.paginator.is_requested(request):
+            page = await sync_to_async(self.paginate_queryset)(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer([course async for course in queryset], many=True)
+        return Response(serializer.data)
+    
+    async def aretrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (Course.DoesNotExist, ValueError, TypeError, ValidationError, DjangoValidationError):
+            raise Http404
+        self.check_object_permissions(request, instance)
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, 'enrolled_course_ids', None) is not None:
+            context['enrolled_course_ids'] = self.enrolled_course_ids
+        return context
     
     def perform_create(self, serializer):
         serializer.save(instructor=self.request.user)
     
+    def replica_allowed(self, request):
+        # A cache miss just after a change refills the shared cache, so it must not read a lagging replica.
+        changed_at = cache.get(f'lms:{self.cache_namespace}:changed_at') or 0
+        return time.time() - changed_at > getattr(settings, 'LMS_REPLICA_MAX_LAG', 5) + 1
+    
+    def get_cache_scope(self, request):
+        # Mirrors the visibility rules in get_queryset.
+        if request.user.is_authenticated and request.user.role == 'admin':
+            return 'admin'
+        if request.user.is_authenticated and request.user.role == 'instructor':
+            return f'instructor:{request.user.pk}'
+        return 'public'
+    
+    def _cached_courses(self, data):
+        if isinstance(data, dict):
+            return data.get('results', [data])
+        return data
+    
+    def personalize_cached_data(self, request, data):
+        # is_enrolled is per caller, so it is re-applied on top of the shared payload.
+        courses = self._cached_courses(data)
+        if not courses or 'is_enrolled' not in courses[0]:
+            return data, ''
+        enrolled_ids = {str(course_id) for course_id in get_enrolled_course_ids(self.get_serializer_context())}
+        courses = [
+            {**course, 'is_enrolled': course.get('id') in enrolled_ids}
+            for course in courses
+        ]
+        if isinstance(data, dict) and 'results' in data:
+            data = {**data, 'results': courses}
+        elif isinstance(data, dict):
+            data = courses[0]
+        else:
+            data = courses
+        enrolled = ','.join(str(course.get('id')) for course in courses if course['is_enrolled'])
+        return data, enrolled
+    
+    def get_last_modified(self, data):
+        timestamps = [
+            parse_datetime(course['updated_at'])
+            for course in self._cached_courses(data) if course.get('updated_at')
+        ]
+        if timestamps:
+            return int(max(timestamps).timestamp())
+        return None
+    
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_courses(self, request):
         if request.user.role == 'instructor':
-            courses = Course.objects.filter(instructor=request.user).annotate(
-                annotated_enrollment_count=Count('enrollments')
+            courses = Course.objects.select_related('instructor', 'category').filter(instructor=request.user).annotate(
+                annotated_enrollment_count=enrollment_count_subquery()
             )
         elif request.user.role == 'student':
             enrollments = Enrollment.objects.filter(student=request.user)
-            courses = Course.objects.filter(enrollments__in=enrollments).annotate(
-                annotated_enrollment_count=Count('enrollments')
+            courses = Course.objects.select_related('instructor', 'category').filter(enrollments__in=enrollments).annotate(
+                annotated_enrollment_count=enrollment_count_subquery()
             )
         else:
             courses = Course.objects.none()
@@ -85,9 +263,18 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = EnrollmentCursorPagination
+    
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return EnrollmentDetailSerializer
+        return EnrollmentSerializer
     
     def get_queryset(self):
-        queryset = Enrollment.objects.select_related('student', 'course', 'course__instructor')
+        # Everything the nested course details render comes from this one query.
+        queryset = Enrollment.objects.select_related(
+            'student', 'course', 'course__instructor', 'course__category'
+        ).annotate(course_enrollment_count=enrollment_count_subquery('course_id'))
         
         if self.request.user.role == 'student':
             queryset = queryset.filter(student=self.request.user)
@@ -96,50 +283,176 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def create(self, request, *args, **kwargs):
+        return idempotent(request, lambda: super(EnrollmentViewSet, self).create(request, *args, **kwargs))
+    
     def perform_create(self, serializer):
         serializer.save(student=self.request.user)
+    
+    @action(detail=False, methods=['post'], url_path='bulk', permission_classes=[IsAuthenticated, IsAdminOrInstructor])
+    def bulk(self, request):
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        pairs = [(item['student'], item['course']) for item in serializer.validated_data['enrollments']]
+        results = bulk_enroll(pairs, request.user)
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response({
+            'created': created,
+            'skipped': len(results) - created,
+            'results': results,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['post'], url_path='progress')
+    def progress(self, request, pk=None):
+        # Frequent player ticks are buffered in a shared cache and written in
+        # batches; reaching 100 completes the enrollment immediately.
+        serializer = EnrollmentProgressSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            enrollment_id = str(uuid.UUID(pk))
+        except ValueError:
+            raise Http404
+        owner = enrollment_owner(enrollment_id)
+        if owner is None or owner[0] != request.user.pk:
+            raise Http404
+        
+        progress = serializer.validated_data['progress']
+        if progress == 100:
+            enrollment = complete_enrollment(enrollment_id)
+            if enrollment is None:
+                raise Http404
+            return Response({
+                'id': enrollment_id,
+                'progress': enrollment.progress,
+                'status': enrollment.status,
+            }, status=status.HTTP_200_OK)
+        
+        record_progress(enrollment_id, progress)
+        return Response({
+            'id': enrollment_id,
+            'progress': progress,
+            'status': owner[1],
+        }, status=status.HTTP_202_ACCEPTED)
 
 
-class DashboardStatsView(APIView):
+class DashboardStatsView(AsyncDispatchMixin, ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
     
-    def get(self, request):
-        stats = {
-            'total_users': User.objects.count(),
-            'total_students': User.objects.filter(role='student').count(),
-            'total_instructors': User.objects.filter(role='instructor').count(),
-            'total_courses': Course.objects.count(),
-            'total_enrollments': Enrollment.objects.count(),
-            'published_courses': Course.objects.filter(is_published=True).count(),
-            'active_enrollments': Enrollment.objects.filter(status='active').count(),
-        }
+    async def get(self, request):
+        if counters_enabled():
+            stats = await sync_to_async(read_dashboard_counters)()
+        else:
+            stats = await aaggregate_dashboard_stats()
         
         serializer = DashboardStatsSerializer(stats)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class EnrollmentReportView(APIView):
+class EnrollmentReportView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated, IsAdmin]
+    renderer_classes = REPORT_RENDERER_CLASSES
     
     def get(self, request):
-        enrollments = Enrollment.objects.select_related(
-            'student', 'course', 'course__instructor'
-        ).order_by('-enrolled_at')
+        if isinstance(request.accepted_renderer, StreamingRowRenderer):
+            rows = Enrollment.objects.order_by('-enrolled_at', '-id').values(
+                'id', 'student_id', 'course_id', 'status', 'progress', 'enrolled_at', 'completed_at',
+                student_email=F('student__email'),
+                student_first_name=F('student__first_name'),
+                student_last_name=F('student__last_name'),
+                course_title=F('course__title'),
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            return streaming_export(request, rows, ENROLLMENT_EXPORT_FIELDS, 'enrollments')
         
-        serializer = EnrollmentSerializer(enrollments, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Read-only rows rendered like EnrollmentSerializer, without model instances.
+        projection, rows = enrollment_report_rows(Enrollment.objects.order_by('-enrolled_at'))
+        
+        paginator = EnrollmentReportPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(projection.convert_rows(page))
+        
+        return Response(projection.convert_rows(rows), status=status.HTTP_200_OK)
 
 
-class CourseReportView(APIView):
+class CourseReportView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated, IsAdminOrInstructor]
+    renderer_classes = REPORT_RENDERER_CLASSES
     
     def get(self, request):
-        courses = Course.objects.select_related('instructor', 'category').annotate(
-            annotated_enrollment_count=Count('enrollments')
-        ).order_by('-created_at')
+        if isinstance(request.accepted_renderer, StreamingRowRenderer):
+            rows = Course.objects.order_by('-created_at', '-id')
+            if request.user.role == 'instructor':
+                rows = rows.filter(instructor=request.user)
+            rows = rows.annotate(enrollment_count=enrollment_count_subquery()).values(
+                'id', 'title', 'category_id', 'instructor_id', 'difficulty', 'duration',
+                'price', 'is_published', 'enrollment_count', 'created_at', 'updated_at',
+                category_name=F('category__name'),
+                instructor_email=F('instructor__email'),
+                instructor_first_name=F('instructor__first_name'),
+                instructor_last_name=F('instructor__last_name'),
+            ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            return streaming_export(request, rows, COURSE_EXPORT_FIELDS, 'courses')
         
+        courses = Course.objects.order_by('-created_at')
         if request.user.role == 'instructor':
             courses = courses.filter(instructor=request.user)
         
-        serializer = CourseSerializer(courses, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        # Read-only rows rendered like CourseSerializer, without model instances.
+        projection, rows = course_report_rows(courses)
+        
+        paginator = CourseReportPagination()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(projection.convert_rows(page))
+        
+        return Response(projection.convert_rows(rows), status=status.HTTP_200_OK)
+
+
+class EnrollmentAnalyticsView(ReplicaReadMixin, APIView):
+    permission_classes = [IsAuthenticated, IsAdminOrInstructor]
+    
+    def get(self, request):
+        serializer = EnrollmentAnalyticsQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        period = params['period']
+        start, end = params['start'], params['end']
+        
+        # Reads the daily rollups only, never the enrollments table.
+        rollups = EnrollmentDailyRollup.objects.all()
+        if request.user.role == 'instructor':
+            rollups = rollups.filter(course__instructor=request.user)
+        if 'course' in params:
+            rollups = rollups.filter(course_id=params['course'])
+        
+        return Response({
+            'period': period,
+            'start': start,
+            'end': end,
+            'results': enrollment_series(rollups, period, start, end),
+        }, status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        return Response(get_cache_stats(['courses', 'categories']), status=status.HTTP_200_OK)
+
+
+class PerformanceStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        return Response(get_performance_stats(), status=status.HTTP_200_OK)
+    
+    def delete(self, request):
+        reset_performance_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
@@ -89,6 +89,11 @@ const lmsService = {
         const response = await api.get('/lms/reports/courses/');
         return response.data;
     },
+
+    getEnrollmentAnalytics: async (params = {}) => {
+        const response = await api.get('/lms/analytics/enrollments/', { params });
+        return response.data;
+    },
 };
 
 export default lmsService;
\ No newline at end of file